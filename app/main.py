@@ -1,13 +1,53 @@
-from fastapi import FastAPI
-from fastapi.responses import RedirectResponse
-import subprocess
-import threading
+import os
+import sys
+import json
+import math
 import time
+import hmac
+import asyncio
+import logging
+import threading
+import subprocess
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI, HTTPException, Request, Header, Depends
+from fastapi.concurrency import run_in_threadpool, iterate_in_threadpool
+from fastapi.responses import RedirectResponse, StreamingResponse, Response, JSONResponse
+from starlette.background import BackgroundTask
+from pydantic import BaseModel
 import uvicorn
 
-app = FastAPI(title="Jupiter FAQ Bot", description="A conversational AI bot for Jupiter banking FAQs")
+from src.bot import JupiterFAQBot
+from src.metrics import REGISTRY, HTTP_REQUEST_DURATION
+from src.reloader import IndexFileWatcher
+from src.admission import AdmissionController, AdmissionRejected
+from src.tracing import TRACER
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
+MAX_BATCH_SIZE = int(os.getenv('FAQ_MAX_BATCH_SIZE', '32'))
+RELOAD_WATCH_INTERVAL = float(os.getenv('FAQ_RELOAD_WATCH_INTERVAL', '0'))
+ADMIN_TOKEN = os.getenv('FAQ_ADMIN_TOKEN')
+TRUSTED_PROXIES = {host.strip() for host in os.getenv('FAQ_TRUSTED_PROXIES', '').split(',') if host.strip()}
+
+bot: Optional[JupiterFAQBot] = None
+admission = AdmissionController.from_env()
 streamlit_process = None
+watcher: Optional[IndexFileWatcher] = None
+startup_error: Optional[str] = None
+
+
+class AskRequest(BaseModel):
+    query: str
+
+
+class BatchAskRequest(BaseModel):
+    queries: List[str]
+
 
 def start_streamlit():
     """Start Streamlit server in background"""
@@ -19,33 +59,242 @@ def start_streamlit():
             "--server.address", "0.0.0.0",
             "--server.headless", "true"
         ])
-        print("Streamlit server started on port 8502")
+        logger.info("Streamlit server started on port 8502")
     except Exception as e:
-        print(f"Failed to start Streamlit: {e}")
+        logger.error(f"Failed to start Streamlit: {e}")
+
+
+def create_bot(warmup: bool = True) -> Optional[JupiterFAQBot]:
+    """Build and initialize the shared bot (blocking)"""
+    # Shared by every client, so it keeps no conversation history
+    faq_bot = JupiterFAQBot(record_history=False)
+    if faq_bot.initialize(warmup=warmup):
+        return faq_bot
+    logger.error("FAQ bot failed to initialize; query endpoints will return 503")
+    return None
+
+
+async def load_bot():
+    """Load (or, when preloaded by a pre-fork master, just warm) the bot in the background"""
+    global bot, watcher, startup_error
+    try:
+        if bot is None:
+            bot = await run_in_threadpool(create_bot)
+            if bot is None:
+                startup_error = "FAQ bot failed to initialize"
+                return
+        elif not bot.ready:
+            await run_in_threadpool(bot.warmup)
+    except Exception as e:
+        startup_error = str(e)
+        logger.error(f"Bot startup failed: {startup_error}")
+        return
+
+    if RELOAD_WATCH_INTERVAL > 0:
+        watcher = IndexFileWatcher(bot, interval=RELOAD_WATCH_INTERVAL).start()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start loading the bot without blocking startup so /health answers while /ready is 503"""
+    if os.getenv('START_STREAMLIT', 'true').lower() in ('1', 'true', 'yes'):
+        start_streamlit()
+
+    loader = asyncio.create_task(load_bot())
+
+    yield
+
+    if not loader.done():
+        loader.cancel()
+    if watcher is not None:
+        watcher.stop()
+    if streamlit_process is not None:
+        streamlit_process.terminate()
+
+
+app = FastAPI(
+    title="Jupiter FAQ Bot",
+    description="A conversational AI bot for Jupiter banking FAQs",
+    lifespan=lifespan
+)
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    # Label by route template so path parameters can't blow up series cardinality
+    route_path = route.path if route is not None else "unmatched"
+    HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, request.method, route_path, response.status_code)
+    return response
+
+
+def get_bot() -> JupiterFAQBot:
+    if bot is None or not bot.ready:
+        raise HTTPException(status_code=503, detail="FAQ bot is not ready")
+    return bot
+
+
+def client_id(request: Request) -> str:
+    # Rate limits key on the peer address; a caller could rotate a self-chosen ID to dodge its
+    # bucket, so X-Client-ID is only honoured when set by a configured trusted proxy
+    host = request.client.host if request.client else "unknown"
+    if host in TRUSTED_PROXIES:
+        return request.headers.get("x-client-id") or host
+    return host
+
+
+async def admit(request: Request, cost: float = 1.0) -> int:
+    """Wait for a work slot; returns the degradation level to serve at"""
+    try:
+        return await admission.acquire(client_id(request), cost)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Server busy ({e.reason}), retry later",
+            headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+        )
 
-@app.on_event("startup")
-async def startup_event():
-    """Start Streamlit when FastAPI starts"""
-    streamlit_thread = threading.Thread(target=start_streamlit)
-    streamlit_thread.daemon = True
-    streamlit_thread.start()
-    
-    time.sleep(3)
 
 @app.get("/")
 async def root():
     """Redirect to Streamlit app"""
     return RedirectResponse(url="/streamlit")
 
+
 @app.get("/streamlit")
 async def streamlit_redirect():
     """Redirect to Streamlit app running on port 8502"""
     return RedirectResponse(url="http://localhost:8502")
 
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "service": "Jupiter FAQ Bot"}
 
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 200 only once the model and index are loaded and warmed up"""
+    if bot is None or not bot.ready:
+        status = "failed" if startup_error else "starting"
+        return JSONResponse(status_code=503, content={"status": status, "error": startup_error})
+    return {
+        "status": "ready",
+        "index_version": bot.embeddings.version,
+        "faqs": len(bot.embeddings.faqs),
+        "warmup_seconds": bot.warmup_seconds
+    }
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text-format metrics"""
+    return Response(content=REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.post("/ask")
+async def ask(body: AskRequest, request: Request, timings: bool = False):
+    """Answer a single question; ?timings=true adds the request's span tree"""
+    faq_bot = get_bot()
+    level = await admit(request)
+    try:
+        return await run_in_threadpool(faq_bot.get_response, body.query, level, timings)
+    finally:
+        admission.release()
+
+
+@app.post("/ask/batch")
+async def ask_batch(body: BatchAskRequest, request: Request):
+    """Answer several questions with one batched retrieval pass"""
+    faq_bot = get_bot()
+    if len(body.queries) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch size exceeds limit of {MAX_BATCH_SIZE}")
+    level = await admit(request, cost=max(len(body.queries), 1))
+    try:
+        results = await run_in_threadpool(faq_bot.get_responses, body.queries, level)
+    finally:
+        admission.release()
+    return {"results": results, "degradation_level": level}
+
+
+def format_sse(event: dict) -> str:
+    return f"event: {event['event']}\ndata: {json.dumps(event['data'], ensure_ascii=False)}\n\n"
+
+
+@app.get("/ask/stream")
+async def ask_stream(request: Request, query: str):
+    """Stream an answer as server-sent events: retrieval, token..., done"""
+    faq_bot = get_bot()
+    level = await admit(request)
+    cancelled = threading.Event()
+    events = faq_bot.stream_response(query, cancelled=cancelled, degradation=level)
+    released = False
+
+    def release_slot():
+        nonlocal released
+        if not released:
+            released = True
+            admission.release()
+
+    async def event_source():
+        try:
+            async for event in iterate_in_threadpool(events):
+                if await request.is_disconnected():
+                    logger.info("Client disconnected from /ask/stream")
+                    break
+                yield format_sse(event)
+        finally:
+            # The worker thread may still be blocked on the next LLM token; the flag stops it
+            # at the next token and closing the generator releases the upstream connection
+            cancelled.set()
+            try:
+                await run_in_threadpool(events.close)
+            except ValueError:
+                pass
+            release_slot()
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Covers streams that are abandoned before the body iterator ever starts
+        background=BackgroundTask(release_slot)
+    )
+
+
+def require_admin(x_admin_token: Optional[str] = Header(default=None)):
+    # Fails closed: admin endpoints are disabled unless FAQ_ADMIN_TOKEN is configured
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set FAQ_ADMIN_TOKEN")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token.encode('utf-8'), ADMIN_TOKEN.encode('utf-8')):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@app.post("/admin/reload", dependencies=[Depends(require_admin)])
+async def admin_reload(rebuild: bool = False):
+    """Load (or rebuild) the FAQ index in the background and swap it in"""
+    faq_bot = get_bot()
+    try:
+        return await run_in_threadpool(faq_bot.reload, rebuild)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@app.get("/admin/traces/slow", dependencies=[Depends(require_admin)])
+async def admin_slow_traces(limit: int = 20):
+    """Most recent requests slower than FAQ_SLOW_TRACE_MS, with their span trees"""
+    return {"threshold_ms": TRACER.slow_ms, "traces": TRACER.slow_traces(max(limit, 0))}
+
+
+@app.get("/categories")
+async def categories():
+    """List FAQ categories"""
+    faq_bot = get_bot()
+    return {"categories": sorted(faq_bot.get_categories())}
+
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
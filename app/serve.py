@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+import os
+import sys
+import gc
+import time
+import signal
+import socket
+import argparse
+import logging
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+
+def configure_threads(threads: int):
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+    # HF tokenizers deadlock or warn when their thread pool crosses a fork
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(threads)
+    faiss = sys.modules.get("faiss")
+    if faiss is not None and hasattr(faiss, "omp_set_num_threads"):
+        faiss.omp_set_num_threads(threads)
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(worker_id: int, sock: socket.socket, threads: int, log_level: str):
+    import uvicorn
+    import app.main as api
+    from src.utils import get_memory_usage
+    from src.metrics import PROCESS_MEMORY
+
+    configure_threads(threads)
+    for kind in ("rss", "pss", "shared_clean", "shared_dirty", "private_clean", "private_dirty"):
+        PROCESS_MEMORY.set_function(lambda kind=kind: get_memory_usage().get(kind, 0), kind)
+
+    logger.info(f"Worker {worker_id} (pid {os.getpid()}) serving with {threads} compute thread(s)")
+    config = uvicorn.Config(api.app, lifespan="on", log_level=log_level)
+    server = uvicorn.Server(config)
+    server.run(sockets=[sock])
+
+
+def log_worker_memory(workers: dict):
+    from src.utils import get_memory_usage, format_bytes
+
+    master = get_memory_usage()
+    logger.info(f"Master pid {os.getpid()}: rss={format_bytes(master.get('rss', 0))}")
+    total_pss = master.get('pss', 0)
+    for pid, worker_id in sorted(workers.items(), key=lambda item: item[1]):
+        usage = get_memory_usage(str(pid))
+        total_pss += usage.get('pss', 0)
+        shared = usage.get('shared_clean', 0) + usage.get('shared_dirty', 0)
+        private = usage.get('private_clean', 0) + usage.get('private_dirty', 0)
+        logger.info(
+            f"Worker {worker_id} pid {pid}: rss={format_bytes(usage.get('rss', 0))} "
+            f"pss={format_bytes(usage.get('pss', 0))} shared={format_bytes(shared)} private={format_bytes(private)}"
+        )
+    if total_pss:
+        logger.info(f"Total PSS across master and {len(workers)} workers: {format_bytes(total_pss)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the FAQ API from pre-forked workers sharing one loaded model")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("FAQ_WORKERS", "2")))
+    parser.add_argument("--threads-per-worker", type=int, default=None,
+                        help="torch/OMP threads per worker (default: cores // workers)")
+    parser.add_argument("--memory-report-interval", type=float, default=300.0,
+                        help="Seconds between per-worker memory reports (0 disables periodic reports)")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    threads = args.threads_per_worker or max(1, (os.cpu_count() or 1) // args.workers)
+
+    # Load with a single compute thread: an OpenMP pool started in the master does not
+    # survive fork, and workers size their own pools after forking
+    configure_threads(1)
+    os.environ["START_STREAMLIT"] = "false"
+
+    import app.main as api
+
+    start = time.perf_counter()
+    # Warmup happens in each worker after the fork, where the compute threads actually run
+    api.bot = api.create_bot(warmup=False)
+    if api.bot is None:
+        logger.error("Bot failed to initialize in the master; refusing to fork workers")
+        sys.exit(1)
+    logger.info(f"Master loaded model and index in {time.perf_counter() - start:.2f}s")
+
+    # Move everything allocated so far out of the collector's reach so GC passes in the
+    # workers don't write to (and un-share) the pages holding the preloaded objects
+    gc.collect()
+    gc.freeze()
+
+    sock = bind_socket(args.host, args.port)
+    workers = {}
+    shutting_down = False
+
+    def spawn(worker_id: int):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            try:
+                run_worker(worker_id, sock, threads, args.log_level)
+            finally:
+                os._exit(0)
+        workers[pid] = worker_id
+
+    def shutdown(signum, frame):
+        nonlocal shutting_down
+        shutting_down = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+
+    for worker_id in range(args.workers):
+        spawn(worker_id)
+    logger.info(f"Started {args.workers} workers on {args.host}:{args.port} ({threads} thread(s) each)")
+
+    # Give workers a moment to finish startup before the first memory report
+    next_report = time.monotonic() + 5.0
+    while workers:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid:
+            worker_id = workers.pop(pid, None)
+            if not shutting_down and worker_id is not None:
+                logger.warning(f"Worker {worker_id} (pid {pid}) exited with status {status}; respawning")
+                spawn(worker_id)
+            continue
+
+        if not shutting_down and next_report is not None and time.monotonic() >= next_report:
+            log_worker_memory(workers)
+            next_report = time.monotonic() + args.memory_report_interval if args.memory_report_interval > 0 else None
+        time.sleep(0.5)
+
+    sock.close()
+    logger.info("All workers stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -34,7 +34,7 @@ warnings.filterwarnings('ignore')
 sys.path.append('..')
 
 from src.bot import JupiterFAQBot
-from src.utils import load_json_file
+from src.corpus_io import read_records
 
 plt.style.use('default')
 sns.set_palette("husl")
@@ -49,8 +49,8 @@ initialization_success = bot.initialize()
 print(f"Bot initialization: {'✅ Success' if initialization_success else '❌ Failed'}")
 
 if initialization_success:
-    raw_faqs = load_json_file('../data/raw_faqs.json')
-    processed_faqs = load_json_file('../data/processed_faqs.json')
+    raw_faqs = read_records('../data/raw_faqs.jsonl')
+    processed_faqs = read_records('../data/processed_faqs.jsonl')
     
     print(f"Raw FAQs loaded: {len(raw_faqs)}")
     print(f"Processed FAQs loaded: {len(processed_faqs)}")
@@ -1,12 +1,17 @@
 import streamlit as st
 import sys
 import os
+from collections import OrderedDict
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.bot import JupiterFAQBot
+from src.bot import JupiterFAQBot, POPULAR_QUESTIONS
+from src.embeddings import normalize_query
 from src.utils import get_timestamp
 import json
 
+HISTORY_PAGE_SIZE = 10
+MAX_CACHED_ANSWERS = 100
+
 st.set_page_config(
     page_title="Jupiter FAQ Bot",
     page_icon="🏦",
@@ -16,11 +21,49 @@ st.set_page_config(
 
 @st.cache_resource
 def initialize_bot():
-    bot = JupiterFAQBot()
+    # Shared by every session, so history lives in each session's state instead of the bot
+    bot = JupiterFAQBot(record_history=False)
     if bot.initialize():
         return bot
     return None
 
+def ask(question: str):
+    # Button callbacks queue a question; it is answered once on the rerun that follows
+    st.session_state.pending_query = question
+
+def submit_query():
+    ask(st.session_state.query_input)
+
+def set_history_page(page: int):
+    st.session_state.history_page = page
+
+def toggle_popular_questions():
+    st.session_state.show_popular = not st.session_state.show_popular
+
+def clear_conversation():
+    st.session_state.conversation_history = []
+    st.session_state.answers = OrderedDict()
+    st.session_state.history_page = 0
+
+def get_answer(bot, query: str):
+    # Memoized per session: asking the same question again costs no backend call. Bounded LRU,
+    # and emptied when a reload swaps in a new index version so answers are never stale
+    answers = st.session_state.answers
+    version = bot.embeddings.version
+    if st.session_state.answers_version != version:
+        answers.clear()
+        st.session_state.answers_version = version
+    
+    key = normalize_query(query)
+    if key in answers:
+        answers.move_to_end(key)
+        return answers[key]
+    with st.spinner("Thinking..."):
+        answers[key] = bot.get_response(query)
+    if len(answers) > MAX_CACHED_ANSWERS:
+        answers.popitem(last=False)
+    return answers[key]
+
 def main():
     st.title("🏦 Jupiter FAQ Bot")
     st.markdown("Ask me anything about Jupiter banking services!")
@@ -37,6 +80,11 @@ def main():
     if 'bot_instance' not in st.session_state:
         st.session_state.bot_instance = bot
     
+    st.session_state.setdefault('answers', OrderedDict())
+    st.session_state.setdefault('answers_version', None)
+    st.session_state.setdefault('history_page', 0)
+    st.session_state.setdefault('show_popular', False)
+    
     with st.sidebar:
         st.header("📊 Bot Information")
         
@@ -46,57 +94,56 @@ def main():
             st.write(f"• {category}")
         
         st.subheader("Quick Actions")
-        if st.button("Clear Conversation"):
-            st.session_state.conversation_history = []
-            bot.clear_history()
+        if st.button("Clear Conversation", on_click=clear_conversation):
             st.success("Conversation cleared!")
         
-        if st.button("Show Popular Questions"):
-            popular_questions = [
-                "How do I make a payment?",
-                "What documents are needed for KYC?",
-                "How do Jupiter rewards work?",
-                "What are the transaction limits?",
-                "How do I activate my debit card?"
-            ]
+        st.button("Hide Popular Questions" if st.session_state.show_popular else "Show Popular Questions",
+                  on_click=toggle_popular_questions)
+        if st.session_state.show_popular:
             st.subheader("Popular Questions")
-            for q in popular_questions:
-                if st.button(q, key=f"pop_{q}"):
-                    st.session_state.current_query = q
+            for q in POPULAR_QUESTIONS:
+                st.button(q, key=f"pop_{q}", on_click=ask, args=(q,))
     
     col1, col2 = st.columns([2, 1])
     
     with col1:
         st.subheader("💬 Chat with Jupiter Bot")
         
-        query = st.text_input(
-            "Ask your question:",
-            placeholder="e.g., How do I transfer money using Jupiter?",
-            key="query_input"
-        )
-        
-        if hasattr(st.session_state, 'current_query'):
-            query = st.session_state.current_query
-            delattr(st.session_state, 'current_query')
+        # A form only reruns the script with the question on submit, not on every keystroke or
+        # unrelated widget interaction
+        with st.form("ask_form", clear_on_submit=True):
+            st.text_input(
+                "Ask your question:",
+                placeholder="e.g., How do I transfer money using Jupiter?",
+                key="query_input"
+            )
+            st.form_submit_button("Ask Question", type="primary", on_click=submit_query)
         
-        if st.button("Ask Question", type="primary") or query:
-            if query.strip():
-                with st.spinner("Thinking..."):
-                    result = bot.get_response(query)
-                
-                st.session_state.conversation_history.append({
-                    'query': query,
-                    'result': result,
-                    'timestamp': get_timestamp()
-                })
-                
-                st.success("Response generated!")
+        query = st.session_state.pop('pending_query', None)
+        if query and query.strip():
+            result = get_answer(bot, query)
+            st.session_state.conversation_history.append({
+                'query': query,
+                'result': result,
+                'timestamp': get_timestamp()
+            })
+            st.session_state.history_page = 0
+            st.success("Response generated!")
         
-        if st.session_state.conversation_history:
+        history = st.session_state.conversation_history
+        if history:
             st.subheader("💭 Conversation History")
             
-            for i, conv in enumerate(reversed(st.session_state.conversation_history)):
-                with st.expander(f"Q: {conv['query'][:50]}..." if len(conv['query']) > 50 else f"Q: {conv['query']}", expanded=(i==0)):
+            # Only one page of the (newest first) history is rendered per rerun
+            pages = (len(history) - 1) // HISTORY_PAGE_SIZE + 1
+            page = min(st.session_state.history_page, pages - 1)
+            start = len(history) - page * HISTORY_PAGE_SIZE
+            page_entries = range(start - 1, max(start - HISTORY_PAGE_SIZE, 0) - 1, -1)
+            
+            for entry in page_entries:
+                conv = history[entry]
+                newest = entry == len(history) - 1
+                with st.expander(f"Q: {conv['query'][:50]}..." if len(conv['query']) > 50 else f"Q: {conv['query']}", expanded=newest):
                     st.write(f"**You:** {conv['query']}")
                     st.write(f"**Jupiter Bot:** {conv['result']['response']}")
                     
@@ -115,12 +162,19 @@ def main():
                     
                     if conv['result']['suggestions']:
                         st.write("**Related Questions:**")
-                        for suggestion in conv['result']['suggestions']:
-                            if st.button(suggestion, key=f"suggest_{i}_{suggestion}"):
-                                st.session_state.current_query = suggestion
-                                st.rerun()
+                        for i, suggestion in enumerate(conv['result']['suggestions']):
+                            st.button(suggestion, key=f"suggest_{entry}_{i}", on_click=ask, args=(suggestion,))
                     
                     st.write(f"*{conv['timestamp']}*")
+            
+            if pages > 1:
+                prev_col, info_col, next_col = st.columns([1, 2, 1])
+                with prev_col:
+                    st.button("← Newer", disabled=page == 0, on_click=set_history_page, args=(page - 1,))
+                with info_col:
+                    st.caption(f"Page {page + 1} of {pages} ({len(history)} questions)")
+                with next_col:
+                    st.button("Older →", disabled=page >= pages - 1, on_click=set_history_page, args=(page + 1,))
     
     with col2:
         st.subheader("📋 FAQ Categories")
@@ -134,12 +188,10 @@ def main():
             category_faqs = bot.search_by_category(selected_category, limit=5)
             
             st.write(f"**{selected_category} FAQs:**")
-            for faq in category_faqs:
+            for i, faq in enumerate(category_faqs):
                 with st.expander(faq['question']):
                     st.write(faq['answer'])
-                    if st.button(f"Ask about this", key=f"cat_{faq['question']}"):
-                        st.session_state.current_query = faq['question']
-                        st.rerun()
+                    st.button(f"Ask about this", key=f"cat_{i}", on_click=ask, args=(faq['question'],))
         
         st.subheader("🔍 Search Tips")
         st.info("""
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import logging
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CANNED_REPLY = (
+    "Thanks for reaching out! Based on the Jupiter FAQ, you can do this directly from the app. "
+    "Let me know if you need anything else."
+)
+
+
+class LatencyModel:
+    def __init__(self, distribution: str = "lognormal", mean_ms: float = 400.0,
+                 stddev_ms: float = 150.0, seed: Optional[int] = None):
+        if distribution not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        self.distribution = distribution
+        self.mean_ms = mean_ms
+        self.stddev_ms = stddev_ms
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self) -> float:
+        with self._lock:
+            if self.distribution == "fixed":
+                value = self.mean_ms
+            elif self.distribution == "uniform":
+                value = self._random.uniform(self.mean_ms - self.stddev_ms, self.mean_ms + self.stddev_ms)
+            elif self.distribution == "normal":
+                value = self._random.gauss(self.mean_ms, self.stddev_ms)
+            else:
+                # Parameterise the underlying normal so the samples have the requested mean/stddev
+                variance = self.stddev_ms ** 2
+                sigma2 = math.log(1 + variance / (self.mean_ms ** 2))
+                mu = math.log(self.mean_ms) - sigma2 / 2
+                value = self._random.lognormvariate(mu, sigma2 ** 0.5)
+        return max(value, 0.0) / 1000.0
+
+
+class FakeLLMServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: Optional[LatencyModel] = None,
+                 error_rate: float = 0.0, error_status: int = 503, token_interval_ms: float = 20.0,
+                 seed: Optional[int] = None):
+        self.latency = latency or LatencyModel(seed=seed)
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.token_interval = token_interval_ms / 1000.0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'errors': 0, 'cancelled_streams': 0}
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeLLMServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Fake LLM server listening on {self.base_url}")
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _next_outcome(self) -> Tuple[float, bool]:
+        with self._lock:
+            self.stats['requests'] += 1
+            failed = self._random.random() < self.error_rate
+            if failed:
+                self.stats['errors'] += 1
+        return self.latency.sample(), failed
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                try:
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                except json.JSONDecodeError:
+                    self._send_json(400, {'error': {'message': 'invalid JSON body'}})
+                    return
+
+                if self.path.rstrip('/') not in ("/v1/chat/completions", "/chat/completions"):
+                    self._send_json(404, {'error': {'message': f'unknown path {self.path}'}})
+                    return
+
+                delay, failed = server._next_outcome()
+                time.sleep(delay)
+                if failed:
+                    self._send_json(server.error_status, {'error': {'message': 'injected failure'}})
+                    return
+
+                if payload.get('stream'):
+                    self._send_stream(payload.get('model', 'fake'))
+                    return
+
+                self._send_json(200, {
+                    'id': f"chatcmpl-fake-{int(time.time() * 1000)}",
+                    'object': 'chat.completion',
+                    'model': payload.get('model', 'fake'),
+                    'choices': [{
+                        'index': 0,
+                        'message': {'role': 'assistant', 'content': CANNED_REPLY},
+                        'finish_reason': 'stop'
+                    }],
+                    'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0}
+                })
+
+            def _send_stream(self, model: str):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Connection', 'close')
+                self.end_headers()
+                self.close_connection = True
+                try:
+                    for word in CANNED_REPLY.split(' '):
+                        chunk = {
+                            'object': 'chat.completion.chunk',
+                            'model': model,
+                            'choices': [{'index': 0, 'delta': {'content': word + ' '}, 'finish_reason': None}]
+                        }
+                        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+                        self.wfile.flush()
+                        time.sleep(server.token_interval)
+                    self.wfile.write(b"data: [DONE]\n\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    with server._lock:
+                        server.stats['cancelled_streams'] += 1
+
+            def _send_json(self, status: int, body: dict):
+                data = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub server for load testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-distribution", default="lognormal",
+                        choices=["fixed", "uniform", "normal", "lognormal"])
+    parser.add_argument("--latency-mean-ms", type=float, default=400.0)
+    parser.add_argument("--latency-stddev-ms", type=float, default=150.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--token-interval-ms", type=float, default=20.0, help="Delay between streamed tokens")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    latency = LatencyModel(args.latency_distribution, args.latency_mean_ms, args.latency_stddev_ms, args.seed)
+    server = FakeLLMServer(args.host, args.port, latency, args.error_rate, args.error_status,
+                           args.token_interval_ms, args.seed)
+    logger.info(f"Serving fake LLM on {server.base_url} (set OPENAI_BASE_URL to this)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
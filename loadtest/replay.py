@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import threading
+import logging
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Tuple, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.query_log import read_query_log
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+StageSample = Tuple[str, float, Optional[str]]
+
+
+class BotTarget:
+    name = "bot"
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._local = threading.local()
+        bot.add_stage_listener(self._on_stage)
+
+    def _on_stage(self, stage: str, seconds: float, error: Optional[Exception]):
+        samples = getattr(self._local, 'samples', None)
+        if samples is not None:
+            samples.append((stage, seconds, type(error).__name__ if error else None))
+
+    def call(self, query: str) -> List[StageSample]:
+        self._local.samples = []
+        try:
+            self.bot.get_response(query)
+            return self._local.samples
+        finally:
+            self._local.samples = None
+
+
+class HTTPTarget:
+    name = "http"
+
+    def __init__(self, base_url: str, concurrency: int, timeout: float = 30.0):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.url = base_url.rstrip('/') + "/ask"
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def call(self, query: str) -> List[StageSample]:
+        response = self.session.post(self.url, json={'query': query}, timeout=self.timeout)
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        return []
+
+
+class LoadReport:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, Counter] = defaultdict(Counter)
+        self.completed = 0
+        self.failed = 0
+        self.wall_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, queue_delay: float, total: float, samples: List[StageSample], error: Optional[str]):
+        with self._lock:
+            self.latencies['queue'].append(queue_delay)
+            self.latencies['total'].append(total)
+            for stage, seconds, stage_error in samples:
+                self.latencies[stage].append(seconds)
+                if stage_error:
+                    self.errors[stage][stage_error] += 1
+            if error:
+                self.failed += 1
+                self.errors['total'][error] += 1
+            else:
+                self.completed += 1
+
+    def summary(self) -> Dict:
+        stages = {}
+        for stage, values in self.latencies.items():
+            ordered = sorted(values)
+            stages[stage] = {
+                'count': len(ordered),
+                'p50_ms': _percentile(ordered, 50) * 1000,
+                'p95_ms': _percentile(ordered, 95) * 1000,
+                'p99_ms': _percentile(ordered, 99) * 1000,
+                'max_ms': ordered[-1] * 1000 if ordered else 0.0,
+                'errors': dict(self.errors.get(stage, {}))
+            }
+        return {
+            'requests': self.completed + self.failed,
+            'completed': self.completed,
+            'failed': self.failed,
+            'wall_seconds': self.wall_seconds,
+            'throughput_rps': self.completed / self.wall_seconds if self.wall_seconds else 0.0,
+            'stages': stages
+        }
+
+
+def _percentile(ordered: List[float], percentile: float) -> float:
+    if not ordered:
+        return 0.0
+    # Nearest rank; round() would go through banker's rounding and land one rank high
+    rank = max(math.ceil(percentile / 100.0 * len(ordered)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def replay(target, entries: List[Dict], concurrency: int = 8, speed: float = 1.0) -> LoadReport:
+    report = LoadReport()
+    if not entries:
+        return report
+
+    first_ts = entries[0]['ts']
+    # Open-loop schedule: latency is measured from the recorded arrival time, so queueing
+    # behind a saturated pool shows up in the numbers instead of being hidden by it
+    schedule = [((entry['ts'] - first_ts) / speed, entry['query']) for entry in entries]
+
+    def run_one(scheduled_at: float, query: str):
+        started = time.perf_counter()
+        samples, error = [], None
+        try:
+            samples = target.call(query)
+        except Exception as e:
+            error = str(e) if isinstance(e, RuntimeError) else type(e).__name__
+        finished = time.perf_counter()
+        report.record(started - scheduled_at, finished - scheduled_at, samples, error)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for offset, query in schedule:
+            scheduled_at = start + offset
+            delay = scheduled_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(run_one, scheduled_at, query)
+    report.wall_seconds = time.perf_counter() - start
+    return report
+
+
+def print_summary(summary: Dict):
+    print(f"\nRequests: {summary['requests']}  completed: {summary['completed']}  failed: {summary['failed']}")
+    print(f"Wall time: {summary['wall_seconds']:.2f}s  throughput: {summary['throughput_rps']:.2f} req/s\n")
+    print(f"{'stage':<14}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}  errors")
+    for stage, stats in sorted(summary['stages'].items()):
+        errors = ", ".join(f"{name}={count}" for name, count in stats['errors'].items()) or "-"
+        print(f"{stage:<14}{stats['count']:>8}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}"
+              f"{stats['p99_ms']:>10.1f}{stats['max_ms']:>10.1f}  {errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded query log against the FAQ bot")
+    parser.add_argument("--log", required=True, help="JSONL query log (see FAQ_QUERY_LOG)")
+    parser.add_argument("--target", default="bot", help="'bot' for in-process, or the base URL of the API")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--speed", type=float, default=1.0, help="Arrival-rate multiplier (2.0 = twice as fast)")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--fake-llm", action="store_true", help="Start a local fake LLM server for the bot target")
+    parser.add_argument("--fake-latency-mean-ms", type=float, default=400.0)
+    parser.add_argument("--fake-latency-stddev-ms", type=float, default=150.0)
+    parser.add_argument("--fake-error-rate", type=float, default=0.0)
+    parser.add_argument("--output", default=None, help="Write the JSON summary to this file")
+    args = parser.parse_args()
+
+    entries = read_query_log(args.log)[:args.limit]
+    logger.info(f"Replaying {len(entries)} queries at {args.speed}x with concurrency {args.concurrency}")
+
+    fake_server = None
+    if args.target == "bot":
+        if args.fake_llm:
+            from loadtest.fake_llm import FakeLLMServer, LatencyModel
+            latency = LatencyModel("lognormal", args.fake_latency_mean_ms, args.fake_latency_stddev_ms)
+            fake_server = FakeLLMServer(latency=latency, error_rate=args.fake_error_rate).start()
+            os.environ['OPENAI_BASE_URL'] = fake_server.base_url
+            os.environ.setdefault('OPENAI_API_KEY', 'fake-key')
+
+        from src.bot import JupiterFAQBot
+        bot = JupiterFAQBot(record_history=False)
+        if not bot.initialize():
+            print("Failed to initialize the bot")
+            return
+        target = BotTarget(bot)
+    else:
+        target = HTTPTarget(args.target, args.concurrency)
+
+    try:
+        summary = replay(target, entries, args.concurrency, args.speed).summary()
+    finally:
+        if fake_server is not None:
+            fake_server.stop()
+
+    print_summary(summary)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        logger.info(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,10 @@
 #!/usr/bin/env python3
 
 import os
+import functools
 import sys
+import time
+import argparse
 import logging
 from dotenv import load_dotenv
 
@@ -11,64 +14,209 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from src.scraper import JupiterFAQScraper
 from src.preprocessor import FAQPreprocessor
-from src.embeddings import FAQEmbeddings
+from src.embeddings import FAQEmbeddings, DEFAULT_MODEL_NAME, DEFAULT_BACKEND
 from src.bot import JupiterFAQBot
+from src.pipeline import Stage, PipelineRunner
+from src.streaming import StreamingBuild
+from src.profiling import write_report
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def run_complete_pipeline():
+RAW_FAQS_FILE = "data/raw_faqs.jsonl"
+PROCESSED_FAQS_FILE = "data/processed_faqs.jsonl"
+EMBEDDINGS_FILE = "data/embeddings.pkl"
+INDEX_FILE = "data/faiss_index.bin"
+CHANGESET_FILE = "data/changeset.json"
+DEDUP_THRESHOLD = 0.8
+
+TEST_QUERIES = [
+    "How do I make a payment?",
+    "What documents are needed for KYC?",
+    "How do Jupiter rewards work?"
+]
+
+
+def scrape_stage() -> dict:
+    scraper = JupiterFAQScraper()
+    faqs = scraper.scrape_faqs()
+    scraper.save_faqs(RAW_FAQS_FILE)
+    if scraper.manifest:
+        scraper.save_manifest()
+    logger.info(f"Scraped {len(faqs)} FAQs")
+    return {'items': len(faqs)}
+
+
+def preprocess_stage(incremental: bool = False, threshold: float = 0.8) -> dict:
+    preprocessor = FAQPreprocessor()
+    raw_faqs = preprocessor.load_raw_faqs(RAW_FAQS_FILE)
+    if not raw_faqs:
+        raise ValueError(f"No raw FAQs in {RAW_FAQS_FILE}")
+    if incremental:
+        processed_faqs = preprocessor.process_faqs_incremental(raw_faqs, threshold=threshold)
+        preprocessor.save_changeset(CHANGESET_FILE)
+    else:
+        processed_faqs = preprocessor.process_faqs(raw_faqs, threshold=threshold)
+    preprocessor.save_processed_faqs(PROCESSED_FAQS_FILE)
+    logger.info(f"Processed {len(processed_faqs)} FAQs")
+    return {'items': len(raw_faqs)}
+
+
+def embed_stage() -> dict:
+    embeddings = FAQEmbeddings()
+    faqs = embeddings.load_faqs(PROCESSED_FAQS_FILE)
+    if not faqs:
+        raise ValueError(f"No processed FAQs in {PROCESSED_FAQS_FILE}")
+    embeddings.create_embeddings()
+    embeddings.build_faiss_index()
+    embeddings.save_embeddings(EMBEDDINGS_FILE, INDEX_FILE)
+    logger.info("Embeddings created and saved")
+    return {'items': len(faqs)}
+
+
+def streaming_build_stage(threshold: float = 0.8) -> dict:
+    summary = StreamingBuild(JupiterFAQScraper(), threshold=threshold).run(
+        RAW_FAQS_FILE, PROCESSED_FAQS_FILE, EMBEDDINGS_FILE, INDEX_FILE)
+    return dict(summary, items=summary['raw'])
+
+
+def smoke_test_stage() -> dict:
+    bot = JupiterFAQBot()
+    if not bot.initialize(warmup=False):
+        raise RuntimeError("Bot failed to initialize")
+    for query in TEST_QUERIES:
+        result = bot.get_response(query)
+        logger.info(f"Query: {query}")
+        logger.info(f"Confidence: {result['confidence']:.2f}")
+        logger.info(f"Response: {result['response'][:100]}...")
+        logger.info("-" * 50)
+    return {'items': len(TEST_QUERIES)}
+
+
+def build_stages(incremental: bool = False, streaming: bool = False) -> list:
+    # code= lists this file (the stage bodies), each stage's module and every src module it
+    # imports, directly or not
+    smoke_test = Stage("smoke_test", smoke_test_stage,
+                       inputs=[EMBEDDINGS_FILE, INDEX_FILE],
+                       params={'queries': TEST_QUERIES},
+                       code=["run_pipeline.py", "src/bot.py", "src/context.py", "src/embeddings.py",
+                             "src/llm_client.py", "src/query_log.py", "src/metrics.py", "src/admission.py",
+                             "src/tracing.py", "src/corpus_io.py"],
+                       deps=["build" if streaming else "embed"])
+    if streaming:
+        # Scrape, preprocess and embed overlapped in one stage; see src/streaming.py
+        return [
+            Stage("build", functools.partial(streaming_build_stage, DEDUP_THRESHOLD),
+                  outputs=[RAW_FAQS_FILE, PROCESSED_FAQS_FILE, EMBEDDINGS_FILE, INDEX_FILE],
+                  params={'urls': os.getenv('FAQ_SCRAPE_URLS', ''), 'threshold': DEDUP_THRESHOLD,
+                          'model_name': DEFAULT_MODEL_NAME, 'backend': DEFAULT_BACKEND},
+                  code=["run_pipeline.py", "src/streaming.py", "src/scraper.py", "src/http_scraper.py",
+                        "src/categorizer.py", "src/preprocessor.py", "src/dedup.py", "src/embeddings.py",
+                        "src/metrics.py", "src/tracing.py", "src/corpus_io.py"],
+                  volatile=True),
+            smoke_test,
+        ]
+    return [
+        Stage("scrape", scrape_stage,
+              outputs=[RAW_FAQS_FILE],
+              params={'urls': os.getenv('FAQ_SCRAPE_URLS', '')},
+              code=["run_pipeline.py", "src/scraper.py", "src/http_scraper.py", "src/categorizer.py", "src/corpus_io.py"],
+              volatile=True),
+        Stage("preprocess", functools.partial(preprocess_stage, incremental, DEDUP_THRESHOLD),
+              inputs=[RAW_FAQS_FILE],
+              outputs=[PROCESSED_FAQS_FILE] + ([CHANGESET_FILE] if incremental else []),
+              params={'threshold': DEDUP_THRESHOLD, 'incremental': incremental},
+              code=["run_pipeline.py", "src/preprocessor.py", "src/dedup.py", "src/categorizer.py", "src/corpus_io.py"],
+              deps=["scrape"]),
+        Stage("embed", embed_stage,
+              inputs=[PROCESSED_FAQS_FILE],
+              outputs=[EMBEDDINGS_FILE, INDEX_FILE],
+              params={'model_name': DEFAULT_MODEL_NAME, 'backend': DEFAULT_BACKEND},
+              code=["run_pipeline.py", "src/embeddings.py", "src/metrics.py", "src/tracing.py", "src/corpus_io.py"],
+              deps=["preprocess"]),
+        smoke_test,
+    ]
+
+
+def run_complete_pipeline(stages=None, force: bool = False, force_stages=(), dry_run: bool = False,
+                          incremental: bool = False, streaming: bool = False,
+                          state_file: str = "data/.pipeline_state.json",
+                          profile_report: str = None, profile_dir: str = None, trace_memory: bool = False):
     logger.info("Starting Jupiter FAQ Bot Pipeline")
-    
+
     try:
-        logger.info("Step 1: Scraping FAQs...")
-        scraper = JupiterFAQScraper()
-        faqs = scraper.scrape_faqs()
-        scraper.save_faqs()
-        logger.info(f"Scraped {len(faqs)} FAQs")
-        
-        logger.info("Step 2: Processing FAQs...")
-        preprocessor = FAQPreprocessor()
-        raw_faqs = preprocessor.load_raw_faqs()
-        processed_faqs = preprocessor.process_faqs(raw_faqs)
-        preprocessor.save_processed_faqs()
-        logger.info(f"Processed {len(processed_faqs)} FAQs")
-        
-        logger.info("Step 3: Creating embeddings...")
-        embeddings = FAQEmbeddings()
-        embeddings.load_faqs()
-        embeddings.create_embeddings()
-        embeddings.build_faiss_index()
-        embeddings.save_embeddings()
-        logger.info("Embeddings created and saved")
-        
-        logger.info("Step 4: Testing bot...")
-        bot = JupiterFAQBot()
-        if bot.initialize():
-            test_queries = [
-                "How do I make a payment?",
-                "What documents are needed for KYC?",
-                "How do Jupiter rewards work?"
-            ]
-            
-            for query in test_queries:
-                result = bot.get_response(query)
-                logger.info(f"Query: {query}")
-                logger.info(f"Confidence: {result['confidence']:.2f}")
-                logger.info(f"Response: {result['response'][:100]}...")
-                logger.info("-" * 50)
-        
-        logger.info("Pipeline completed successfully!")
-        logger.info("You can now run: streamlit run demo/streamlit_app.py")
-        
+        runner = PipelineRunner(build_stages(incremental, streaming), state_file=state_file)
+        results = runner.run(selected=stages, force=force, force_stages=force_stages, dry_run=dry_run,
+                             profile=bool(profile_report), profile_dir=profile_dir,
+                             trace_memory=trace_memory)
     except Exception as e:
         logger.error(f"Pipeline failed: {str(e)}")
         return False
-        
+
+    if profile_report:
+        write_report(results, profile_report, metadata={
+            'argv': sys.argv[1:], 'incremental': incremental, 'streaming': streaming,
+            'trace_memory': trace_memory})
+
+    summary = ", ".join(f"{name}={result['status']}" for name, result in results.items())
+    logger.info(f"Stage summary: {summary}")
+    if any(result['status'] == 'failed' for result in results.values()):
+        logger.error("Pipeline failed")
+        return False
+
+    logger.info("Pipeline completed successfully!")
+    logger.info("You can now run: streamlit run demo/streamlit_app.py")
     return True
 
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build the FAQ bot data: scrape, preprocess, embed, smoke test")
+    parser.add_argument("--stages", default=None,
+                        help="Comma-separated stages to consider (default: all of scrape,preprocess,embed,smoke_test)")
+    parser.add_argument("--force", action="store_true", help="Re-run the selected stages even if up to date")
+    parser.add_argument("--force-stage", action="append", default=[],
+                        help="Re-run this stage even if up to date (repeatable)")
+    parser.add_argument("--dry-run", action="store_true", help="Only report which stages are stale")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Preprocess incrementally against the content-hash cache")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Overlap scraping, cleaning and encoding in one 'build' stage instead of "
+                             "scrape/preprocess/embed")
+    parser.add_argument("--state-file", default="data/.pipeline_state.json",
+                        help="Where stage fingerprints from the last successful runs are kept")
+    parser.add_argument("--profile", nargs="?", const="", default=None, metavar="REPORT",
+                        help="Record per-stage wall/CPU time, peak RSS and throughput to a JSON report "
+                             "(default: data/profiles/pipeline-<timestamp>.json)")
+    parser.add_argument("--profile-dir", default=None,
+                        help="Also dump a cProfile file per stage into this directory (implies --profile)")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Track peak Python allocations with tracemalloc (slower; implies --profile)")
+    args = parser.parse_args()
+    if args.streaming and args.incremental:
+        parser.error("--incremental applies to the preprocess stage and can't be combined with --streaming")
+    return args
+
+
 if __name__ == "__main__":
-    success = run_complete_pipeline()
+    args = parse_args()
+    stages = [name.strip() for name in args.stages.split(",")] if args.stages else None
+    profile_report = args.profile
+    if profile_report is None and (args.profile_dir or args.trace_memory):
+        profile_report = ""
+    if profile_report == "":
+        profile_report = f"data/profiles/pipeline-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    success = run_complete_pipeline(
+        stages=stages,
+        force=args.force,
+        force_stages=args.force_stage,
+        dry_run=args.dry_run,
+        incremental=args.incremental,
+        streaming=args.streaming,
+        state_file=args.state_file,
+        profile_report=profile_report,
+        profile_dir=args.profile_dir,
+        trace_memory=args.trace_memory
+    )
     if success:
         print("\n✅ Pipeline completed successfully!")
         print("Next steps:")
@@ -0,0 +1,163 @@
+import os
+import time
+import asyncio
+import threading
+import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Optional, Sequence
+
+from .metrics import REGISTRY
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+NORMAL = 0
+NO_LLM = 1
+LEXICAL_ONLY = 2
+EXACT_MATCH_ONLY = 3
+DEGRADATION_LEVELS = ["normal", "no_llm", "lexical_only", "exact_match_only"]
+
+ADMISSION_REJECTED = REGISTRY.counter(
+    "faq_admission_rejected_total", "Requests rejected by admission control", ["reason"])
+ADMISSION_QUEUE_DEPTH = REGISTRY.gauge(
+    "faq_admission_queue_depth", "Requests waiting for a work slot")
+ADMISSION_IN_FLIGHT = REGISTRY.gauge(
+    "faq_admission_in_flight", "Requests holding a work slot")
+DEGRADATION_LEVEL = REGISTRY.gauge(
+    "faq_degradation_level", "Current degradation level (0=normal, 1=no LLM, 2=lexical only, 3=exact match only)")
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: float = 1.0):
+        super().__init__(f"Request rejected: {reason}")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def consume(self, amount: float = 1.0) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return True
+        return False
+
+    def seconds_until(self, amount: float = 1.0) -> float:
+        return max(0.0, (amount - self.tokens) / self.rate) if self.rate > 0 else float('inf')
+
+
+class RateLimiter:
+    def __init__(self, rate: float = 10.0, burst: float = 20.0, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(self, client_id: str, cost: float = 1.0) -> Optional[float]:
+        # Returns None when allowed, otherwise the seconds until the client may retry
+        if self.rate <= 0:
+            return None
+        # A request costing more than the burst could never be admitted, and its Retry-After
+        # would never come true; it drains a full bucket instead
+        cost = min(cost, self.burst)
+        with self._lock:
+            bucket = self._buckets.get(client_id)
+            if bucket is None:
+                bucket = self._buckets[client_id] = TokenBucket(self.rate, self.burst)
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client_id)
+            if bucket.consume(cost):
+                return None
+            return bucket.seconds_until(cost)
+
+
+class AdmissionController:
+    def __init__(self, max_concurrency: int = 8, max_queue: int = 64, queue_timeout: float = 10.0,
+                 degrade_thresholds: Sequence[float] = (0.25, 0.5, 0.75),
+                 rate_limiter: Optional[RateLimiter] = None):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        # Queue-depth fractions at which each successive degradation level kicks in
+        self.degrade_thresholds = tuple(sorted(degrade_thresholds))
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.waiting = 0
+        self.in_flight = 0
+        self._slots = None
+
+        ADMISSION_QUEUE_DEPTH.set_function(lambda: self.waiting)
+        ADMISSION_IN_FLIGHT.set_function(lambda: self.in_flight)
+        DEGRADATION_LEVEL.set_function(self.degradation_level)
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        thresholds = [float(value) for value in os.getenv('FAQ_DEGRADE_THRESHOLDS', '0.25,0.5,0.75').split(',')]
+        return cls(
+            max_concurrency=int(os.getenv('FAQ_MAX_CONCURRENCY', '8')),
+            max_queue=int(os.getenv('FAQ_MAX_QUEUE', '64')),
+            queue_timeout=float(os.getenv('FAQ_QUEUE_TIMEOUT', '10')),
+            degrade_thresholds=thresholds,
+            rate_limiter=RateLimiter(
+                rate=float(os.getenv('FAQ_RATE_LIMIT', '10')),
+                burst=float(os.getenv('FAQ_RATE_BURST', '20'))
+            )
+        )
+
+    def degradation_level(self) -> int:
+        depth = self.waiting / self.max_queue if self.max_queue else 0.0
+        level = NORMAL
+        for threshold in self.degrade_thresholds:
+            if depth >= threshold:
+                level += 1
+        return min(level, EXACT_MATCH_ONLY)
+
+    async def acquire(self, client_id: str, cost: float = 1.0) -> int:
+        # Runs on the event loop thread only, so the counters need no lock
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+
+        retry_after = self.rate_limiter.check(client_id, cost)
+        if retry_after is not None:
+            ADMISSION_REJECTED.inc("rate_limited")
+            raise AdmissionRejected("rate_limited", retry_after)
+
+        if self.in_flight >= self.max_concurrency and self.waiting >= self.max_queue:
+            ADMISSION_REJECTED.inc("queue_full")
+            raise AdmissionRejected("queue_full")
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            ADMISSION_REJECTED.inc("queue_timeout")
+            raise AdmissionRejected("queue_timeout")
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        # Sample the ladder once the request starts: the queue behind it is what it must protect
+        return self.degradation_level()
+
+    def release(self):
+        self.in_flight -= 1
+        self._slots.release()
+
+    @asynccontextmanager
+    async def admit(self, client_id: str, cost: float = 1.0):
+        level = await self.acquire(client_id, cost)
+        try:
+            yield level
+        finally:
+            self.release()
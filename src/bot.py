@@ -1,8 +1,18 @@
 import os
 import json
-import openai
-from typing import List, Dict, Tuple, Optional
+import time
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Tuple, Optional, Callable, Iterator
 from .embeddings import FAQEmbeddings
+from .context import ContextBuilder, TokenCounter
+from .llm_client import LLMClient, CircuitOpenError
+from .query_log import QueryLogWriter, read_query_log
+from .metrics import StageTimer, observe_stage, QUERIES, LLM_CIRCUIT_OPEN, WARMUP_SECONDS
+from .admission import NORMAL, NO_LLM, LEXICAL_ONLY, EXACT_MATCH_ONLY
+from .tracing import TRACER
 import logging
 from dotenv import load_dotenv
 
@@ -11,19 +21,74 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SYSTEM_PROMPT = """You are a helpful customer service assistant for Jupiter, a digital banking app.
+Your role is to provide friendly, accurate, and conversational answers to user questions about Jupiter's services.
+
+Guidelines:
+- Be conversational and friendly
+- Use the provided FAQ context to answer questions accurately
+- If you're not confident about an answer, say so politely
+- Keep responses concise but helpful
+- Use simple language that anyone can understand
+- If the question is not related to Jupiter banking services, politely redirect"""
+
+USER_PROMPT_TEMPLATE = """User Question: {query}
+
+Relevant FAQ Information:
+{context}
+
+Please provide a helpful and conversational response based on the FAQ information above.
+If the FAQs don't contain enough information to answer the question confidently, let the user know and suggest they contact Jupiter support directly."""
+
+POPULAR_QUESTIONS = [
+    "How do I make a payment?",
+    "What documents are needed for KYC?",
+    "How do Jupiter rewards work?",
+    "What are the transaction limits?",
+    "How do I activate my debit card?"
+]
+
 class JupiterFAQBot:
-    def __init__(self, openai_api_key: Optional[str] = None):
+    def __init__(self, openai_api_key: Optional[str] = None, context_token_budget: Optional[int] = None,
+                 record_history: bool = True):
         self.openai_api_key = openai_api_key or os.getenv('OPENAI_API_KEY')
         if not self.openai_api_key:
             logger.warning("No OpenAI API key provided. Bot will work in retrieval-only mode.")
+            self.llm_client = None
         else:
-            openai.api_key = self.openai_api_key
+            self.llm_client = LLMClient(
+                api_key=self.openai_api_key,
+                base_url=os.getenv('OPENAI_BASE_URL'),
+                max_concurrency=int(os.getenv('LLM_MAX_CONCURRENCY', '8'))
+            )
             
         self.embeddings = FAQEmbeddings()
-        self.conversation_history = []
+        # Bounded, and off for shared bots (the API): one process-wide list would grow without
+        # limit and mix every client's queries
+        self.record_history = record_history
+        self.conversation_history = deque(maxlen=int(os.getenv('FAQ_HISTORY_SIZE', '100')))
+        self.ready = False
+        self.warmup_seconds = None
         self.confidence_threshold = 0.6
+        self.lexical_threshold = 0.2
+        
+        self.context_token_budget = context_token_budget or int(os.getenv('FAQ_CONTEXT_TOKEN_BUDGET', '1500'))
+        self.token_counter = TokenCounter()
+        self.context_builder = ContextBuilder(token_counter=self.token_counter)
+        
+        query_log_file = os.getenv('FAQ_QUERY_LOG')
+        self.query_log = QueryLogWriter(query_log_file) if query_log_file else None
+        
+        self._reload_lock = threading.Lock()
+        self.stages = StageTimer([observe_stage])
+        self.embeddings.stages = self.stages
+        if self.llm_client is not None:
+            LLM_CIRCUIT_OPEN.set_function(lambda: 0.0 if self.llm_client.available() else 1.0)
         
-    def initialize(self):
+    def add_stage_listener(self, listener: Callable[[str, float, Optional[Exception]], None]):
+        self.stages.add_listener(listener)
+        
+    def initialize(self, warmup: bool = True):
         logger.info("Initializing FAQ bot...")
         
         if not self.embeddings.load_embeddings():
@@ -38,67 +103,131 @@ class JupiterFAQBot:
                 return False
                 
         logger.info("FAQ bot initialized successfully")
+        if warmup:
+            self.warmup()
         return True
         
-    def search_faqs(self, query: str, k: int = 3) -> List[Tuple[Dict, float]]:
-        return self.embeddings.search_similar(query, k=k, threshold=self.confidence_threshold)
+    def warmup(self, queries: Optional[List[str]] = None, rounds: Optional[int] = None) -> float:
+        self.warmup_seconds = self._warm(self.embeddings, queries, rounds)
+        WARMUP_SECONDS.set(self.warmup_seconds)
+        self.ready = True
+        logger.info(f"FAQ bot warmed up in {self.warmup_seconds:.2f}s and ready for traffic")
+        return self.warmup_seconds
         
-    def generate_response_with_llm(self, query: str, relevant_faqs: List[Tuple[Dict, float]]) -> str:
-        if not self.openai_api_key:
+    def _warm(self, embeddings: FAQEmbeddings, queries: Optional[List[str]] = None,
+              rounds: Optional[int] = None) -> float:
+        rounds = int(os.getenv('FAQ_WARMUP_ROUNDS', '2')) if rounds is None else rounds
+        if rounds <= 0:
+            return 0.0
+        queries = queries or self._warmup_queries(embeddings)
+        
+        start = time.perf_counter()
+        # Repeated encoder passes at the batch and single-query shapes prime the kernels;
+        # one pass through the normal search path fills the query cache and touches the index
+        for _ in range(rounds):
+            embeddings.model.encode(queries)
+            embeddings.model.encode(queries[:1])
+        for query in queries:
+            embeddings.search_similar(query, k=3, threshold=self.confidence_threshold)
+            embeddings.search_lexical(query, k=3, threshold=self.lexical_threshold)
+        return time.perf_counter() - start
+        
+    def _warmup_queries(self, embeddings: FAQEmbeddings) -> List[str]:
+        warmup_file = os.getenv('FAQ_WARMUP_FILE')
+        if warmup_file:
+            try:
+                if warmup_file.endswith('.jsonl'):
+                    queries = [entry['query'] for entry in read_query_log(warmup_file)]
+                else:
+                    with open(warmup_file, 'r', encoding='utf-8') as f:
+                        queries = [line.strip() for line in f if line.strip()]
+                if queries:
+                    return queries[:int(os.getenv('FAQ_WARMUP_MAX_QUERIES', '200'))]
+            except OSError as e:
+                logger.warning(f"Could not read warmup queries from {warmup_file}: {str(e)}")
+        return POPULAR_QUESTIONS + [faq['question'] for faq in embeddings.faqs[:20]]
+        
+    def reload(self, rebuild: bool = False) -> Dict:
+        if not self._reload_lock.acquire(blocking=False):
+            raise RuntimeError("A reload is already in progress")
+        try:
+            start = time.perf_counter()
+            previous = self.embeddings
+            logger.info(f"Reloading FAQ index (current version {previous.version}, rebuild={rebuild})")
+            
+            candidate = FAQEmbeddings(model_name=previous.model_name, model=previous.model, backend=previous.backend)
+            candidate.stages = self.stages
+            if rebuild or not candidate.load_embeddings():
+                if not candidate.load_faqs():
+                    raise ValueError("No FAQs found to rebuild the index")
+                candidate.create_embeddings()
+                candidate.build_faiss_index()
+                candidate.save_embeddings()
+                
+            # Warm the new index before it takes traffic
+            self._warm(candidate)
+            
+            # Single reference assignment: requests that already pinned the old instance finish on it
+            self.embeddings = candidate
+            previous.query_cache.clear()
+            
+            elapsed = time.perf_counter() - start
+            logger.info(f"Swapped FAQ index {previous.version} -> {candidate.version} "
+                        f"({len(candidate.faqs)} FAQs) in {elapsed:.2f}s")
+            return {
+                'previous_version': previous.version,
+                'version': candidate.version,
+                'faqs': len(candidate.faqs),
+                'seconds': elapsed
+            }
+        finally:
+            self._reload_lock.release()
+            
+    def search_faqs(self, query: str, k: int = 3, embeddings: Optional[FAQEmbeddings] = None) -> List[Tuple[Dict, float]]:
+        embeddings = embeddings or self.embeddings
+        return embeddings.search_similar(query, k=k, threshold=self.confidence_threshold)
+        
+    def llm_available(self) -> bool:
+        return self.llm_client is not None and self.llm_client.available()
+        
+    def build_prompt(self, query: str, relevant_faqs: List[Tuple[Dict, float]]) -> Tuple[List[Dict], int]:
+        fixed_tokens = (
+            self.token_counter.count(SYSTEM_PROMPT)
+            + self.token_counter.count(USER_PROMPT_TEMPLATE.format(query=query, context=""))
+        )
+        context_budget = max(self.context_token_budget - fixed_tokens, 0)
+        context, _ = self.context_builder.build(query, relevant_faqs, context_budget)
+
+        user_prompt = USER_PROMPT_TEMPLATE.format(query=query, context=context)
+        prompt_tokens = self.token_counter.count(SYSTEM_PROMPT) + self.token_counter.count(user_prompt)
+        logger.info(f"Prompt tokens: {prompt_tokens} (budget {self.context_token_budget})")
+
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt}
+        ]
+        return messages, prompt_tokens
+
+    def generate_response_with_llm(self, query: str, relevant_faqs: List[Tuple[Dict, float]],
+                                   prompt: Optional[Tuple[List[Dict], int]] = None) -> str:
+        if not self.llm_available():
             return self._generate_simple_response(relevant_faqs)
             
         try:
-            context = self._build_context(relevant_faqs)
-            
-            system_prompt = """You are a helpful customer service assistant for Jupiter, a digital banking app. 
-            Your role is to provide friendly, accurate, and conversational answers to user questions about Jupiter's services.
-            
-            Guidelines:
-            - Be conversational and friendly
-            - Use the provided FAQ context to answer questions accurately
-            - If you're not confident about an answer, say so politely
-            - Keep responses concise but helpful
-            - Use simple language that anyone can understand
-            - If the question is not related to Jupiter banking services, politely redirect
-            """
-            
-            user_prompt = f"""
-            User Question: {query}
-            
-            Relevant FAQ Information:
-            {context}
-            
-            Please provide a helpful and conversational response based on the FAQ information above.
-            If the FAQs don't contain enough information to answer the question confidently, 
-            let the user know and suggest they contact Jupiter support directly.
-            """
-            
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                max_tokens=300,
-                temperature=0.7
-            )
-            
-            return response.choices[0].message.content.strip()
+            messages, _ = prompt or self.build_prompt(query, relevant_faqs)
+            with self.stages.stage('llm'):
+                return self.llm_client.chat(messages, max_tokens=300, temperature=0.7)
             
+        except CircuitOpenError:
+            logger.warning("LLM circuit open, answering from retrieval only")
+            return self._generate_simple_response(relevant_faqs)
         except Exception as e:
             logger.error(f"Error generating LLM response: {str(e)}")
             return self._generate_simple_response(relevant_faqs)
             
-    def _build_context(self, relevant_faqs: List[Tuple[Dict, float]]) -> str:
-        context_parts = []
-        for i, (faq, score) in enumerate(relevant_faqs, 1):
-            context_parts.append(f"""
-            FAQ {i} (Relevance: {score:.2f}):
-            Q: {faq['question']}
-            A: {faq['answer']}
-            Category: {faq['category']}
-            """)
-        return "\n".join(context_parts)
+    def _build_context(self, relevant_faqs: List[Tuple[Dict, float]], query: str = "") -> str:
+        context, _ = self.context_builder.build(query, relevant_faqs, self.context_token_budget)
+        return context
         
     def _generate_simple_response(self, relevant_faqs: List[Tuple[Dict, float]]) -> str:
         if not relevant_faqs:
@@ -111,55 +240,208 @@ class JupiterFAQBot:
         else:
             return f"Based on our FAQ, here's what I found:\n\n{best_faq['answer']}"
             
-    def get_response(self, query: str) -> Dict:
+    def get_response(self, query: str, degradation: int = NORMAL, include_timings: bool = False) -> Dict:
         logger.info(f"Processing query: {query}")
+        QUERIES.inc("single")
+        if self.query_log is not None:
+            self.query_log.record(query)
+            
+        with TRACER.trace('get_response', query=TRACER.redact(query), degradation=degradation) as trace:
+            result = self._respond(query, degradation)
+        if include_timings and trace is not None:
+            result['timings'] = trace.to_dict()
+        return result
         
+    def _respond(self, query: str, degradation: int) -> Dict:
+        # Pin one index version for the whole request so a concurrent reload can't mix versions
+        embeddings = self.embeddings
         if not query.strip():
-            return {
-                'response': "Please ask me a question about Jupiter banking services!",
-                'confidence': 0.0,
-                'source_faqs': [],
-                'suggestions': self._get_popular_questions()
-            }
+            return self._empty_query_response(embeddings, degradation)
             
-        relevant_faqs = self.search_faqs(query, k=3)
+        with self.stages.stage('retrieval'):
+            relevant_faqs = self._retrieve(query, embeddings, degradation)
         
+        return self._compose_response(query, relevant_faqs, embeddings, degradation)
+        
+    def get_responses(self, queries: List[str], degradation: int = NORMAL) -> List[Dict]:
+        logger.info(f"Processing batch of {len(queries)} queries")
+        QUERIES.inc("batch", amount=len(queries))
+        if self.query_log is not None:
+            for query in queries:
+                self.query_log.record(query)
+                
+        with TRACER.trace('get_responses', queries=len(queries), degradation=degradation):
+            embeddings = self.embeddings
+            answerable = [query for query in queries if query.strip()]
+            with self.stages.stage('retrieval'):
+                if degradation >= LEXICAL_ONLY:
+                    batch_results = [self._retrieve(query, embeddings, degradation) for query in answerable]
+                else:
+                    batch_results = embeddings.search_similar_batch(answerable, k=3, threshold=self.confidence_threshold)
+            retrieved = dict(zip(answerable, batch_results))
+            
+            def respond(query: str) -> Dict:
+                if not query.strip():
+                    return self._empty_query_response(embeddings, degradation)
+                return self._compose_response(query, retrieved.get(query, []), embeddings, degradation)
+                
+            # Each worker runs in a copy of this context so its spans land in the batch's trace
+            contexts = [contextvars.copy_context() for _ in queries]
+            # LLM calls dominate batch latency, so overlap them up to the client's concurrency limit
+            workers = max(1, min(len(queries), self.llm_client.max_concurrency if self.llm_client else 1))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                return list(pool.map(lambda context, query: context.run(respond, query), contexts, queries))
+        
+    def stream_response(self, query: str, cancelled: Optional[threading.Event] = None,
+                        degradation: int = NORMAL) -> Iterator[Dict]:
+        logger.info(f"Streaming query: {query}")
+        QUERIES.inc("stream")
+        if self.query_log is not None:
+            self.query_log.record(query)
+            
+        embeddings = self.embeddings
+        if not query.strip():
+            result = self._empty_query_response(embeddings, degradation)
+            yield {'event': 'retrieval', 'data': self._retrieval_summary(result)}
+            yield {'event': 'token', 'data': {'text': result['response']}}
+            yield {'event': 'done', 'data': result}
+            return
+            
+        with self.stages.stage('retrieval'):
+            relevant_faqs = self._retrieve(query, embeddings, degradation)
+            
+        if not relevant_faqs:
+            result = self._compose_response(query, relevant_faqs, embeddings, degradation)
+            yield {'event': 'retrieval', 'data': self._retrieval_summary(result)}
+            yield {'event': 'token', 'data': {'text': result['response']}}
+            yield {'event': 'done', 'data': result}
+            return
+            
+        confidence = relevant_faqs[0][1]
+        with self.stages.stage('suggestions'):
+            suggestions = self._get_related_questions(relevant_faqs, embeddings)
+        yield {'event': 'retrieval', 'data': {
+            'confidence': confidence,
+            'source_faqs': [faq for faq, _ in relevant_faqs],
+            'suggestions': suggestions,
+            'index_version': embeddings.version,
+            'degradation_level': degradation
+        }}
+        
+        with self.stages.stage('prompt'):
+            prompt = self.build_prompt(query, relevant_faqs) if self._use_llm(degradation) else None
+            
+        parts = []
+        error = None
+        if prompt is not None:
+            tokens = None
+            try:
+                with self.stages.stage('llm'):
+                    tokens = self.llm_client.stream_chat(prompt[0], max_tokens=300, temperature=0.7)
+                    for token in tokens:
+                        if cancelled is not None and cancelled.is_set():
+                            logger.info("Stream cancelled by client, stopping LLM generation")
+                            return
+                        parts.append(token)
+                        yield {'event': 'token', 'data': {'text': token}}
+            except Exception as e:
+                logger.error(f"Error streaming LLM response: {str(e)}")
+                error = str(e)
+            finally:
+                if tokens is not None:
+                    tokens.close()
+                    
+        if not parts:
+            fallback = self._generate_simple_response(relevant_faqs)
+            parts.append(fallback)
+            yield {'event': 'token', 'data': {'text': fallback}}
+            
+        response = "".join(parts).strip()
+        self._record_history(query, response, confidence)
+        
+        done = {
+            'response': response,
+            'confidence': confidence,
+            'prompt_tokens': prompt[1] if prompt else 0,
+            'index_version': embeddings.version,
+            'degradation_level': degradation
+        }
+        if error is not None:
+            done['error'] = error
+        yield {'event': 'done', 'data': done}
+        
+    def _retrieval_summary(self, result: Dict) -> Dict:
+        return {
+            'confidence': result['confidence'],
+            'source_faqs': result['source_faqs'],
+            'suggestions': result['suggestions'],
+            'index_version': result['index_version'],
+            'degradation_level': result['degradation_level']
+        }
+        
+    def _empty_query_response(self, embeddings: FAQEmbeddings, degradation: int = NORMAL) -> Dict:
+        return {
+            'response': "Please ask me a question about Jupiter banking services!",
+            'confidence': 0.0,
+            'source_faqs': [],
+            'suggestions': self._get_popular_questions(),
+            'prompt_tokens': 0,
+            'index_version': embeddings.version,
+            'degradation_level': degradation
+        }
+        
+    def _retrieve(self, query: str, embeddings: FAQEmbeddings, degradation: int) -> List[Tuple[Dict, float]]:
+        if degradation >= EXACT_MATCH_ONLY:
+            return embeddings.search_exact(query)
+        if degradation >= LEXICAL_ONLY:
+            return embeddings.search_lexical(query, k=3, threshold=self.lexical_threshold)
+        return self.search_faqs(query, k=3, embeddings=embeddings)
+        
+    def _use_llm(self, degradation: int) -> bool:
+        return degradation < NO_LLM and self.llm_available()
+        
+    def _compose_response(self, query: str, relevant_faqs: List[Tuple[Dict, float]],
+                          embeddings: FAQEmbeddings, degradation: int = NORMAL) -> Dict:
         if not relevant_faqs:
             return {
                 'response': "I couldn't find specific information about that. Could you try rephrasing your question or ask about payments, KYC, rewards, cards, or account limits?",
                 'confidence': 0.0,
                 'source_faqs': [],
-                'suggestions': self._get_popular_questions()
+                'suggestions': self._get_popular_questions(),
+                'prompt_tokens': 0,
+                'index_version': embeddings.version,
+                'degradation_level': degradation
             }
             
-        response = self.generate_response_with_llm(query, relevant_faqs)
+        with self.stages.stage('prompt'):
+            prompt = self.build_prompt(query, relevant_faqs) if self._use_llm(degradation) else None
+        if prompt is not None:
+            response = self.generate_response_with_llm(query, relevant_faqs, prompt=prompt)
+        else:
+            response = self._generate_simple_response(relevant_faqs)
         confidence = relevant_faqs[0][1] if relevant_faqs else 0.0
         
-        self.conversation_history.append({
-            'query': query,
-            'response': response,
-            'confidence': confidence,
-            'timestamp': self._get_timestamp()
-        })
+        self._record_history(query, response, confidence)
+        
+        with self.stages.stage('suggestions'):
+            suggestions = self._get_related_questions(relevant_faqs, embeddings)
         
         return {
             'response': response,
             'confidence': confidence,
             'source_faqs': [faq for faq, _ in relevant_faqs],
-            'suggestions': self._get_related_questions(relevant_faqs)
+            'suggestions': suggestions,
+            'prompt_tokens': prompt[1] if prompt else 0,
+            'index_version': embeddings.version,
+            'degradation_level': degradation
         }
         
     def _get_popular_questions(self) -> List[str]:
-        popular = [
-            "How do I make a payment?",
-            "What documents are needed for KYC?",
-            "How do Jupiter rewards work?",
-            "What are the transaction limits?",
-            "How do I activate my debit card?"
-        ]
-        return popular[:3]
+        return POPULAR_QUESTIONS[:3]
         
-    def _get_related_questions(self, relevant_faqs: List[Tuple[Dict, float]]) -> List[str]:
+    def _get_related_questions(self, relevant_faqs: List[Tuple[Dict, float]],
+                               embeddings: Optional[FAQEmbeddings] = None) -> List[str]:
+        embeddings = embeddings or self.embeddings
         suggestions = []
         
         for faq, _ in relevant_faqs:
@@ -168,7 +450,7 @@ class JupiterFAQBot:
                 
         categories = list(set(faq['category'] for faq, _ in relevant_faqs))
         for category in categories[:2]:
-            category_faqs = self.embeddings.get_category_faqs(category)
+            category_faqs = embeddings.get_category_faqs(category)
             for cat_faq in category_faqs[:2]:
                 if cat_faq['question'] not in [faq['question'] for faq, _ in relevant_faqs]:
                     suggestions.append(cat_faq['question'])
@@ -187,11 +469,20 @@ class JupiterFAQBot:
     def search_by_category(self, category: str, limit: int = 5) -> List[Dict]:
         return self.embeddings.get_category_faqs(category)[:limit]
         
+    def _record_history(self, query: str, response: str, confidence: float):
+        if self.record_history:
+            self.conversation_history.append({
+                'query': query,
+                'response': response,
+                'confidence': confidence,
+                'timestamp': self._get_timestamp()
+            })
+            
     def get_conversation_history(self) -> List[Dict]:
-        return self.conversation_history
+        return list(self.conversation_history)
         
     def clear_history(self):
-        self.conversation_history = []
+        self.conversation_history.clear()
         logger.info("Conversation history cleared")
 
 if __name__ == "__main__":
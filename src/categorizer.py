@@ -0,0 +1,123 @@
+import logging
+from typing import List, Dict
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATEGORY = 'General'
+
+CATEGORY_KEYWORDS = {
+    'Payments': ['payment', 'pay', 'money', 'transfer', 'transaction', 'upi', 'neft', 'imps', 'send money'],
+    'KYC': ['kyc', 'verification', 'document', 'identity', 'verify', 'aadhar', 'pan', 'passport'],
+    'Rewards': ['reward', 'cashback', 'points', 'benefit', 'earn', 'redeem', 'offer'],
+    'Cards': ['card', 'debit', 'credit', 'atm', 'pin', 'activate'],
+    'Limits': ['limit', 'maximum', 'minimum', 'daily limit', 'monthly limit'],
+    'Account': ['account', 'balance', 'statement', 'profile', 'settings'],
+    'Security': ['security', 'password', 'otp', 'fraud', 'safe', 'secure']
+}
+
+# The scraper's shorter table, checked in order with the first matching category winning
+SCRAPER_CATEGORY_KEYWORDS = {
+    'Payments': ['payment', 'pay', 'money', 'transfer'],
+    'KYC': ['kyc', 'verification', 'document', 'identity'],
+    'Rewards': ['reward', 'cashback', 'points', 'benefit'],
+    'Cards': ['card', 'debit', 'credit'],
+    'Limits': ['limit', 'maximum', 'minimum']
+}
+
+SCORE = 'score'
+FIRST_MATCH = 'first_match'
+
+_SEPARATOR = '\x00'
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+    logger.info("pyahocorasick unavailable, categorizing with per-keyword substring scans")
+
+
+class KeywordCategorizer:
+    def __init__(self, category_keywords: Dict[str, List[str]], strategy: str = SCORE,
+                 default: str = DEFAULT_CATEGORY):
+        if strategy not in (SCORE, FIRST_MATCH):
+            raise ValueError(f"Unknown categorization strategy: {strategy}")
+        self.strategy = strategy
+        self.default = default
+        self.categories = list(category_keywords)
+
+        keywords: List[str] = []
+        keyword_ids: Dict[str, int] = {}
+        for category_keywords_list in category_keywords.values():
+            for keyword in category_keywords_list:
+                keyword = keyword.lower()
+                if keyword not in keyword_ids:
+                    keyword_ids[keyword] = len(keywords)
+                    keywords.append(keyword)
+        self.keywords = keywords
+
+        # keyword x category incidence: a text's category scores are its keyword-presence row times this
+        self._keyword_categories = np.zeros((len(keywords), len(self.categories)), dtype=np.int32)
+        for column, category in enumerate(self.categories):
+            for keyword in category_keywords[category]:
+                self._keyword_categories[keyword_ids[keyword.lower()], column] = 1
+
+        self._automaton = None
+        if ahocorasick is not None and keywords:
+            self._automaton = ahocorasick.Automaton()
+            for keyword_id, keyword in enumerate(keywords):
+                self._automaton.add_word(keyword, keyword_id)
+            self._automaton.make_automaton()
+
+    def scores(self, text: str) -> Dict[str, int]:
+        row = self._scores([text])[0]
+        return {category: int(score) for category, score in zip(self.categories, row) if score > 0}
+
+    def categorize(self, text: str) -> str:
+        return self.categorize_batch([text])[0]
+
+    def categorize_batch(self, texts: List[str]) -> List[str]:
+        if not texts:
+            return []
+
+        scores = self._scores(texts)
+        matched = scores.max(axis=1) > 0
+        if self.strategy == FIRST_MATCH:
+            chosen = (scores > 0).argmax(axis=1)
+        else:
+            # argmax returns the first maximum, so ties go to the category listed first
+            # exactly as max() over the ordered score dict did
+            chosen = scores.argmax(axis=1)
+        return [self.categories[column] if hit else self.default for column, hit in zip(chosen, matched)]
+
+    def _scores(self, texts: List[str]) -> np.ndarray:
+        presence = self._keyword_presence([text.lower() for text in texts])
+        return presence.astype(np.int32) @ self._keyword_categories
+
+    def _keyword_presence(self, texts: List[str]) -> np.ndarray:
+        presence = np.zeros((len(texts), len(self.keywords)), dtype=bool)
+        if not self.keywords:
+            return presence
+
+        if self._automaton is None:
+            for row, text in enumerate(texts):
+                presence[row] = [keyword in text for keyword in self.keywords]
+            return presence
+
+        # One automaton pass over the whole batch; keywords never contain the separator,
+        # so no match can straddle two texts. Matches are reported by end offset.
+        starts = np.cumsum([0] + [len(text) + 1 for text in texts[:-1]])
+        corpus = _SEPARATOR.join(texts)
+        matches = np.fromiter(
+            (value for match in self._automaton.iter(corpus) for value in match), dtype=np.int64
+        ).reshape(-1, 2)
+        if len(matches):
+            rows = np.searchsorted(starts, matches[:, 0], side='right') - 1
+            presence[rows, matches[:, 1]] = True
+        return presence
+
+
+FAQ_CATEGORIZER = KeywordCategorizer(CATEGORY_KEYWORDS)
+SCRAPER_CATEGORIZER = KeywordCategorizer(SCRAPER_CATEGORY_KEYWORDS, strategy=FIRST_MATCH)
@@ -0,0 +1,121 @@
+import re
+import logging
+from typing import List, Dict, Tuple, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r'\s+')
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+_WORD = re.compile(r'\w+')
+_APPROX_TOKEN = re.compile(r'\w+|[^\w\s]')
+
+_STOPWORDS = {
+    'a', 'an', 'the', 'is', 'are', 'do', 'does', 'i', 'my', 'me', 'to', 'of', 'in',
+    'on', 'for', 'and', 'or', 'can', 'how', 'what', 'with', 'it', 'be', 'using', 'jupiter'
+}
+
+
+class TokenCounter:
+    def __init__(self, encoding_name: str = "cl100k_base"):
+        self.encoding_name = encoding_name
+        self._encoding = None
+        try:
+            import tiktoken
+            self._encoding = tiktoken.get_encoding(encoding_name)
+        except Exception as e:
+            logger.info(f"tiktoken unavailable ({str(e)}), using approximate token counts")
+
+    @property
+    def exact(self) -> bool:
+        return self._encoding is not None
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._encoding is not None:
+            return len(self._encoding.encode(text))
+        # Roughly one BPE token per four characters of a word, one per punctuation mark
+        return sum((len(piece) + 3) // 4 for piece in _APPROX_TOKEN.findall(text))
+
+
+def compact_whitespace(text: str) -> str:
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+class ContextBuilder:
+    def __init__(self, token_counter: Optional[TokenCounter] = None,
+                 max_answer_tokens: int = 200, min_relevance: float = 0.0):
+        self.token_counter = token_counter or TokenCounter()
+        self.max_answer_tokens = max_answer_tokens
+        self.min_relevance = min_relevance
+
+    def build(self, query: str, relevant_faqs: List[Tuple[Dict, float]],
+              token_budget: int) -> Tuple[str, int]:
+        ranked = sorted(
+            (item for item in relevant_faqs if item[1] >= self.min_relevance),
+            key=lambda item: item[1],
+            reverse=True
+        )
+        query_terms = self._terms(query)
+
+        blocks = []
+        used_tokens = 0
+        for faq, score in ranked:
+            separator_tokens = 1 if blocks else 0
+            remaining = token_budget - used_tokens - separator_tokens
+            header = self._format_block(len(blocks) + 1, faq, score, "")
+            header_tokens = self.token_counter.count(header)
+            if header_tokens >= remaining:
+                logger.debug(f"Dropping FAQ '{faq['question'][:40]}' (relevance {score:.2f}): budget exhausted")
+                continue
+
+            answer_budget = min(self.max_answer_tokens, remaining - header_tokens)
+            answer = self._fit_answer(faq['answer'], query_terms, answer_budget)
+            if not answer:
+                continue
+
+            block = self._format_block(len(blocks) + 1, faq, score, answer)
+            block_tokens = self.token_counter.count(block)
+            if block_tokens > remaining:
+                continue
+
+            blocks.append(block)
+            used_tokens += block_tokens + separator_tokens
+
+        return "\n".join(blocks), used_tokens
+
+    def _format_block(self, position: int, faq: Dict, score: float, answer: str) -> str:
+        return (
+            f"FAQ {position} (Relevance: {score:.2f}):\n"
+            f"Q: {compact_whitespace(faq['question'])}\n"
+            f"A: {answer}\n"
+            f"Category: {faq.get('category', 'General')}"
+        )
+
+    def _fit_answer(self, answer: str, query_terms: set, token_budget: int) -> str:
+        answer = compact_whitespace(answer)
+        if token_budget <= 0:
+            return ""
+        if self.token_counter.count(answer) <= token_budget:
+            return answer
+
+        sentences = [s for s in _SENTENCE_BOUNDARY.split(answer) if s]
+        ranked = sorted(
+            range(len(sentences)),
+            key=lambda i: (-len(query_terms & self._terms(sentences[i])), i)
+        )
+
+        selected = []
+        used = 0
+        for i in ranked:
+            sentence_tokens = self.token_counter.count(sentences[i]) + 1
+            if used + sentence_tokens > token_budget:
+                continue
+            selected.append(i)
+            used += sentence_tokens
+
+        return " ".join(sentences[i] for i in sorted(selected))
+
+    def _terms(self, text: str) -> set:
+        return {w for w in _WORD.findall(text.lower()) if w not in _STOPWORDS}
@@ -0,0 +1,150 @@
+import os
+import io
+import json
+import gzip
+import uuid
+import logging
+from contextlib import contextmanager
+from typing import List, Dict, Any, Iterable, Iterator
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# orjson parses and serializes several times faster than the json module; optional
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    logger.info("orjson unavailable, using the json module for corpus I/O")
+
+JSONL_SUFFIXES = (".jsonl", ".jsonl.gz")
+
+
+def dumps(obj: Any, indent: bool = False) -> str:
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, option=option).decode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None)
+
+
+def loads(text) -> Any:
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def is_jsonl(path: str) -> bool:
+    return path.endswith(JSONL_SUFFIXES)
+
+
+def open_text(path: str, mode: str = 'r'):
+    # Transparent gzip for paths ending in .gz
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = 'w'):
+    # Writes to a temporary file next to `path` and renames it into place on success, so
+    # readers see either the old file or the complete new one, never a partial write.
+    # Paths ending in .gz are gzip-compressed.
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    partial_file = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        with open(partial_file, 'wb') as raw:
+            stream = gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) if path.endswith(".gz") else raw
+            handle = stream if 'b' in mode else io.TextIOWrapper(stream, encoding='utf-8')
+            yield handle
+            if handle is not stream:
+                handle.detach()
+            if stream is not raw:
+                stream.close()
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(partial_file, path)
+    finally:
+        if os.path.exists(partial_file):
+            os.remove(partial_file)
+
+
+def iter_jsonl(path: str) -> Iterator[Dict]:
+    with open_text(path) as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield loads(line)
+            except ValueError:
+                logger.warning(f"Skipping invalid JSON on line {line_number} of {path}")
+
+
+def write_lines(f, records: Iterable[Dict]) -> int:
+    # JSONL records to an already open text file
+    count = 0
+    for record in records:
+        f.write(dumps(record))
+        f.write('\n')
+        count += 1
+    return count
+
+
+def write_jsonl(path: str, records: Iterable[Dict]) -> int:
+    with atomic_write(path) as f:
+        return write_lines(f, records)
+
+
+def read_json(path: str) -> Any:
+    with open_text(path) as f:
+        return loads(f.read())
+
+
+def write_json(path: str, data: Any, indent: bool = True):
+    with atomic_write(path) as f:
+        f.write(dumps(data, indent=indent))
+
+
+def _existing(path: str) -> str:
+    # Corpora moved from .json to .jsonl; read a leftover file under the other name
+    if os.path.exists(path):
+        return path
+    for old, new in ((".jsonl", ".json"), (".json", ".jsonl")):
+        if path.endswith(old) and os.path.exists(path[:-len(old)] + new):
+            logger.info(f"{path} not found, reading {path[:-len(old)] + new}")
+            return path[:-len(old)] + new
+    return path
+
+
+def iter_records(path: str) -> Iterator[Dict]:
+    # Streams JSONL record by record; a .json file holding a list is parsed whole
+    path = _existing(path)
+    if is_jsonl(path):
+        yield from iter_jsonl(path)
+    else:
+        yield from read_json(path)
+
+
+def read_records(path: str) -> List[Dict]:
+    return list(iter_records(path))
+
+
+def read_record_chunks(path: str, chunk_size: int = 1000) -> Iterator[List[Dict]]:
+    # Goes through iter_records, so the .json/.jsonl fallback and legacy JSON lists apply
+    chunk = []
+    for record in iter_records(path):
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def write_records(path: str, records: Iterable[Dict]) -> int:
+    # JSONL for .jsonl(.gz) paths, otherwise a JSON list; atomic either way
+    if is_jsonl(path):
+        return write_jsonl(path, records)
+    records = list(records)
+    write_json(path, records)
+    return len(records)
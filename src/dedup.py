@@ -0,0 +1,212 @@
+import logging
+from typing import List, Dict, Set, Tuple, Optional
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class UnionFind:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+        self.size = [1] * size
+
+    def find(self, item: int) -> int:
+        parent = self.parent
+        while parent[item] != item:
+            # Path halving keeps the trees flat without a recursive pass
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a: int, b: int) -> int:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return root_a
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+        return root_a
+
+    def groups(self, min_size: int = 2) -> List[List[int]]:
+        members: Dict[int, List[int]] = {}
+        for item in range(len(self.parent)):
+            members.setdefault(self.find(item), []).append(item)
+        # Members come out ascending, so ordering groups by their first member is deterministic
+        return sorted((group for group in members.values() if len(group) >= min_size), key=lambda g: g[0])
+
+
+def similar_pairs(matrix: sparse.csr_matrix, threshold: float, top_k: Optional[int] = 50,
+                  block_size: int = 2048,
+                  other: Optional[sparse.csr_matrix] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Rows must be L2-normalized (TfidfVectorizer's default) so the dot product is the cosine.
+    # Multiplying one block of rows at a time keeps memory at block_size x n non-zeros
+    # instead of the dense n x n matrix. With `other`, rows of matrix are compared against
+    # rows of other instead of against each other.
+    matrix = sparse.csr_matrix(matrix)
+    transposed = sparse.csr_matrix(matrix if other is None else other).T.tocsc()
+    rows, cols, sims = [], [], []
+
+    for start in range(0, matrix.shape[0], block_size):
+        block = (matrix[start:start + block_size] @ transposed).tocoo()
+        block_rows = block.row + start
+        keep = block.data >= threshold
+        if other is None:
+            # Upper triangle only: each pair is reported once, from its lower index
+            keep &= block.col > block_rows
+        block_rows, block_cols, block_sims = block_rows[keep], block.col[keep], block.data[keep]
+
+        if top_k is not None and len(block_sims):
+            # Rank each row's candidates by similarity and keep the k best
+            order = np.lexsort((-block_sims, block_rows))
+            block_rows, block_cols, block_sims = block_rows[order], block_cols[order], block_sims[order]
+            row_starts = np.searchsorted(block_rows, block_rows, side='left')
+            keep = (np.arange(len(block_rows)) - row_starts) < top_k
+            block_rows, block_cols, block_sims = block_rows[keep], block_cols[keep], block_sims[keep]
+
+        rows.append(block_rows)
+        cols.append(block_cols)
+        sims.append(block_sims)
+
+    if not rows:
+        empty = np.array([], dtype=np.int64)
+        return empty, empty, np.array([], dtype=np.float64)
+    return np.concatenate(rows), np.concatenate(cols), np.concatenate(sims)
+
+
+def _new_vectorizer() -> TfidfVectorizer:
+    return TfidfVectorizer(stop_words='english', ngram_range=(1, 2))
+
+
+def duplicate_pairs(matrix: sparse.csr_matrix, texts: List[str], threshold: float,
+                    top_k: Optional[int] = 50, block_size: int = 2048) -> List[Tuple[int, int]]:
+    # Only distinct texts go through the product: exact repeats share a vector and would
+    # otherwise make the product blocks dense
+    first_index: Dict[str, int] = {}
+    unique_of = [first_index.setdefault(text, i) for i, text in enumerate(texts)]
+    unique_ids = list(first_index.values())
+    unique_matrix = sparse.csr_matrix(matrix)[unique_ids]
+
+    rows, cols, _ = similar_pairs(unique_matrix, threshold, top_k, block_size)
+    pairs = [(unique_ids[a], unique_ids[b]) for a, b in zip(rows.tolist(), cols.tolist())]
+
+    # A repeat joins its first occurrence only if a vector is similar to itself
+    # (an all-stop-word text has a zero vector and matches nothing)
+    self_similarity = np.asarray(unique_matrix.multiply(unique_matrix).sum(axis=1)).ravel()
+    similar_to_self = dict(zip(unique_ids, (self_similarity >= threshold).tolist()))
+    pairs.extend((first, i) for i, first in enumerate(unique_of) if first != i and similar_to_self[first])
+    return pairs
+
+
+def find_duplicate_groups(texts: List[str], threshold: float = 0.8, top_k: Optional[int] = 50,
+                          block_size: int = 2048) -> List[List[int]]:
+    if len(texts) < 2:
+        return []
+
+    try:
+        tfidf_matrix = _new_vectorizer().fit_transform(texts)
+    except ValueError:
+        # Every text was empty or stop words only: nothing to compare
+        logger.warning("No vocabulary left after TF-IDF preprocessing; skipping duplicate detection")
+        return []
+
+    pairs = duplicate_pairs(tfidf_matrix, texts, threshold, top_k, block_size)
+
+    union_find = UnionFind(len(texts))
+    for a, b in pairs:
+        union_find.union(a, b)
+
+    groups = union_find.groups()
+    logger.info(f"Duplicate detection: {len(pairs)} similar pairs across {len(texts)} texts, {len(groups)} groups")
+    return groups
+
+
+class IncrementalDeduplicator:
+    # Keeps the fitted vectorizer, the TF-IDF rows and the similarity edges between syncs so
+    # new or changed texts are only compared against the existing corpus. The vocabulary and
+    # IDF weights stay frozen until enough of the corpus has turned over to warrant a refit.
+    def __init__(self, threshold: float = 0.8, top_k: Optional[int] = 50, refit_ratio: float = 0.25):
+        self.threshold = threshold
+        self.top_k = top_k
+        self.refit_ratio = refit_ratio
+        self.vectorizer: Optional[TfidfVectorizer] = None
+        self.ids: List[str] = []
+        self.texts: Dict[str, str] = {}
+        self.matrix: Optional[sparse.csr_matrix] = None
+        self.neighbors: Dict[str, Set[str]] = {}
+        self.synced_since_fit = 0
+
+    def fit(self, items: Dict[str, str]):
+        self.ids = list(items)
+        self.texts = dict(items)
+        self.neighbors = {item_id: set() for item_id in self.ids}
+        self.synced_since_fit = 0
+        self.vectorizer = _new_vectorizer()
+        try:
+            self.matrix = self.vectorizer.fit_transform(list(items.values()))
+        except ValueError:
+            logger.warning("No vocabulary left after TF-IDF preprocessing; skipping duplicate detection")
+            self.vectorizer = None
+            self.matrix = None
+            return
+        for a, b in duplicate_pairs(self.matrix, list(items.values()), self.threshold, self.top_k):
+            self._link(self.ids[a], self.ids[b])
+
+    def sync(self, items: Dict[str, str]) -> str:
+        # Brings the index in line with `items` (id -> text) and reports how: 'full', 'incremental' or 'unchanged'
+        stale = [item_id for item_id in self.ids if items.get(item_id) != self.texts[item_id]]
+        fresh = [item_id for item_id in items if self.texts.get(item_id) != items[item_id]]
+        if not stale and not fresh:
+            return 'unchanged'
+        if (self.vectorizer is None or
+                self.synced_since_fit + len(fresh) > self.refit_ratio * max(len(items), 1)):
+            self.fit(items)
+            return 'full'
+
+        stale_set = set(stale)
+        for item_id in stale:
+            for neighbor in self.neighbors.pop(item_id, ()):
+                if neighbor not in stale_set:
+                    self.neighbors[neighbor].discard(item_id)
+            del self.texts[item_id]
+        keep = [i for i, item_id in enumerate(self.ids) if item_id not in stale_set]
+        self.ids = [self.ids[i] for i in keep]
+        self.matrix = self.matrix[keep]
+
+        fresh_texts = [items[item_id] for item_id in fresh]
+        fresh_matrix = self.vectorizer.transform(fresh_texts)
+        for a, b in duplicate_pairs(fresh_matrix, fresh_texts, self.threshold, self.top_k):
+            self._link(fresh[a], fresh[b])
+        if self.ids:
+            rows, cols, _ = similar_pairs(fresh_matrix, self.threshold, self.top_k, other=self.matrix)
+            for a, b in zip(rows.tolist(), cols.tolist()):
+                self._link(fresh[a], self.ids[b])
+
+        for item_id in fresh:
+            self.neighbors.setdefault(item_id, set())
+            self.texts[item_id] = items[item_id]
+        self.ids.extend(fresh)
+        self.matrix = sparse.vstack([self.matrix, fresh_matrix], format='csr')
+        self.synced_since_fit += len(fresh)
+        logger.info(f"Incremental dedup: {len(stale)} removed, {len(fresh)} compared against {len(keep)} existing")
+        return 'incremental'
+
+    def groups(self, order: List[str]) -> List[List[str]]:
+        # Groups over the ids in `order`, each listed in that order and sorted by first member
+        position = {item_id: i for i, item_id in enumerate(order)}
+        union_find = UnionFind(len(order))
+        for item_id, neighbors in self.neighbors.items():
+            if item_id not in position:
+                continue
+            for neighbor in neighbors:
+                if neighbor in position:
+                    union_find.union(position[item_id], position[neighbor])
+        return [[order[i] for i in group] for group in union_find.groups()]
+
+    def _link(self, a: str, b: str):
+        self.neighbors.setdefault(a, set()).add(b)
+        self.neighbors.setdefault(b, set()).add(a)
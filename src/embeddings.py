@@ -2,32 +2,146 @@ import json
 import numpy as np
 from typing import List, Dict, Tuple, Optional
 import faiss
+import sentence_transformers
 from sentence_transformers import SentenceTransformer
 import pickle
+import hashlib
 import os
+import re
+import inspect
+import threading
 import logging
+from collections import OrderedDict
+from .metrics import StageTimer, record_cache_lookup
+from .corpus_io import read_records, atomic_write
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+DEFAULT_MODEL_NAME = "all-MiniLM-L6-v2"
+DEFAULT_BACKEND = os.getenv('FAQ_ENCODER_BACKEND', 'torch')
+ENCODER_BACKENDS = ('torch', 'onnx', 'openvino')
+
+# One loaded encoder per (model name, backend) for the whole process; the pipeline, the bot
+# and any reloads all share it instead of each loading its own copy of the weights
+_ENCODERS: Dict[Tuple[str, str], SentenceTransformer] = {}
+_ENCODER_LOCKS: Dict[Tuple[str, str], threading.Lock] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def check_backend(backend: str):
+    # Non-torch backends arrived in sentence-transformers 3.2; older versions reject the argument
+    if backend not in ENCODER_BACKENDS:
+        raise ValueError(f"Unknown encoder backend '{backend}'; expected one of {', '.join(ENCODER_BACKENDS)}")
+    if backend != 'torch' and 'backend' not in inspect.signature(SentenceTransformer.__init__).parameters:
+        raise ValueError(f"Encoder backend '{backend}' needs sentence-transformers >= 3.2 "
+                         f"(installed: {getattr(sentence_transformers, '__version__', 'unknown')}); use FAQ_ENCODER_BACKEND=torch")
+
+
+def get_encoder(model_name: str = DEFAULT_MODEL_NAME, backend: Optional[str] = None) -> SentenceTransformer:
+    key = (model_name, backend or DEFAULT_BACKEND)
+    check_backend(key[1])
+    encoder = _ENCODERS.get(key)
+    if encoder is not None:
+        return encoder
+    with _REGISTRY_LOCK:
+        load_lock = _ENCODER_LOCKS.setdefault(key, threading.Lock())
+    # Loading takes seconds, so it happens under a per-model lock: concurrent callers asking
+    # for the same model wait for the one load, other models aren't blocked
+    with load_lock:
+        encoder = _ENCODERS.get(key)
+        if encoder is None:
+            logger.info(f"Loading encoder {model_name} (backend {key[1]})")
+            if key[1] == 'torch':
+                encoder = SentenceTransformer(model_name)
+            else:
+                encoder = SentenceTransformer(model_name, backend=key[1])
+            _ENCODERS[key] = encoder
+    return encoder
+
+
+def release_encoders():
+    # Drops the registry's references; instances still holding an encoder keep it alive
+    with _REGISTRY_LOCK:
+        _ENCODERS.clear()
+        _ENCODER_LOCKS.clear()
+
+
+_WHITESPACE = re.compile(r'\s+')
+_NON_WORD = re.compile(r'[^\w\s]')
+
+
+def exact_match_key(text: str) -> str:
+    return _WHITESPACE.sub(' ', _NON_WORD.sub('', text.lower())).strip()
+
+
+def faq_text(faq: Dict) -> str:
+    # What gets embedded for an FAQ
+    return f"{faq['question']} {faq['answer']}"
+
+
+def normalize_query(query: str) -> str:
+    # all-MiniLM-L6-v2 is uncased, so lowercasing changes the cache key but not the embedding
+    return _WHITESPACE.sub(' ', query).strip().lower()
+
+
+class QueryEmbeddingCache:
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+        record_cache_lookup("query_embedding", vector is not None)
+        return vector
+        
+    def put(self, key: str, vector: np.ndarray):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
 class FAQEmbeddings:
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
-        self.model = SentenceTransformer(model_name)
+    def __init__(self, model_name: str = DEFAULT_MODEL_NAME, model: Optional[SentenceTransformer] = None,
+                 backend: Optional[str] = None):
+        self.model_name = model_name
+        self.backend = backend or DEFAULT_BACKEND
+        self.model = model or get_encoder(model_name, self.backend)
+        self.version = None
+        self.lexical_vectorizer = None
+        self.lexical_matrix = None
+        self.exact_lookup = {}
         self.faqs = []
         self.embeddings = None
         self.index = None
         self.dimension = 384  # Default dimension for all-MiniLM-L6-v2
+        self.stages = StageTimer()
+        self.query_cache = QueryEmbeddingCache(int(os.getenv('FAQ_QUERY_CACHE_SIZE', '1024')))
         
-    def load_faqs(self, filename: str = "data/processed_faqs.json") -> List[Dict]:
+    def load_faqs(self, filename: str = "data/processed_faqs.jsonl") -> List[Dict]:
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                self.faqs = json.load(f)
+            self.faqs = read_records(filename)
             logger.info(f"Loaded {len(self.faqs)} processed FAQs")
             return self.faqs
         except FileNotFoundError:
             logger.error(f"File {filename} not found")
             return []
-        except json.JSONDecodeError:
+        except ValueError:
             logger.error(f"Invalid JSON in {filename}")
             return []
             
@@ -38,10 +152,7 @@ class FAQEmbeddings:
             
         logger.info("Creating embeddings for FAQs...")
         
-        texts = []
-        for faq in self.faqs:
-            combined_text = f"{faq['question']} {faq['answer']}"
-            texts.append(combined_text)
+        texts = [faq_text(faq) for faq in self.faqs]
             
         self.embeddings = self.model.encode(texts, show_progress_bar=True)
         self.dimension = self.embeddings.shape[1]
@@ -61,39 +172,71 @@ class FAQEmbeddings:
         normalized_embeddings = self.embeddings / np.linalg.norm(self.embeddings, axis=1, keepdims=True)
         self.index.add(normalized_embeddings.astype('float32'))
         
-        logger.info(f"Built FAISS index with {self.index.ntotal} vectors")
+        self.version = self._compute_version()
+        self._build_fallback_indexes()
+        logger.info(f"Built FAISS index with {self.index.ntotal} vectors (version {self.version})")
         return self.index
         
     def search_similar(self, query: str, k: int = 5, threshold: float = 0.5) -> List[Tuple[Dict, float]]:
+        results = self.search_similar_batch([query], k=k, threshold=threshold)
+        return results[0] if results else []
+        
+    def search_similar_batch(self, queries: List[str], k: int = 5, threshold: float = 0.5) -> List[List[Tuple[Dict, float]]]:
         if self.index is None:
             logger.error("No FAISS index found. Call build_faiss_index() first.")
             return []
+        if not queries:
+            return []
             
-        query_embedding = self.model.encode([query])
-        query_embedding = query_embedding / np.linalg.norm(query_embedding, axis=1, keepdims=True)
+        query_embeddings = self.encode_queries(queries)
+        
+        with self.stages.stage('search'):
+            scores, indices = self.index.search(query_embeddings, k)
         
-        scores, indices = self.index.search(query_embedding.astype('float32'), k)
+        all_results = []
+        for row_scores, row_indices in zip(scores, indices):
+            results = []
+            for score, idx in zip(row_scores, row_indices):
+                if score >= threshold and 0 <= idx < len(self.faqs):
+                    results.append((self.faqs[idx], float(score)))
+            all_results.append(results)
+                
+        return all_results
         
-        results = []
-        for i, (score, idx) in enumerate(zip(scores[0], indices[0])):
-            if score >= threshold and idx < len(self.faqs):
-                results.append((self.faqs[idx], float(score)))
+    def encode_queries(self, queries: List[str]) -> np.ndarray:
+        with self.stages.stage('normalize'):
+            normalized = [normalize_query(query) for query in queries]
+            
+        with self.stages.stage('cache_lookup'):
+            vectors = {}
+            for key in normalized:
+                if key not in vectors:
+                    vectors[key] = self.query_cache.get(key)
+            missing = [key for key, vector in vectors.items() if vector is None]
+            
+        if missing:
+            with self.stages.stage('encode'):
+                encoded = self.model.encode(missing)
+                encoded = (encoded / np.linalg.norm(encoded, axis=1, keepdims=True)).astype('float32')
+            for key, vector in zip(missing, encoded):
+                vectors[key] = vector
+                self.query_cache.put(key, vector)
                 
-        return results
+        return np.vstack([vectors[key] for key in normalized])
         
     def save_embeddings(self, embeddings_file: str = "data/embeddings.pkl", 
                        index_file: str = "data/faiss_index.bin"):
-        os.makedirs(os.path.dirname(embeddings_file), exist_ok=True)
-        
-        with open(embeddings_file, 'wb') as f:
+        # Atomic so a serving process watching these files never loads a half-written one
+        with atomic_write(embeddings_file, 'wb') as f:
             pickle.dump({
                 'embeddings': self.embeddings,
                 'faqs': self.faqs,
                 'dimension': self.dimension
-            }, f)
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
             
         if self.index is not None:
-            faiss.write_index(self.index, index_file)
+            with atomic_write(index_file, 'wb') as f:
+                f.write(faiss.serialize_index(self.index).tobytes())
             
         logger.info(f"Embeddings saved to {embeddings_file}")
         logger.info(f"FAISS index saved to {index_file}")
@@ -110,7 +253,9 @@ class FAQEmbeddings:
             if os.path.exists(index_file):
                 self.index = faiss.read_index(index_file)
                 
-            logger.info(f"Loaded embeddings and index successfully")
+            self.version = self._compute_version()
+            self._build_fallback_indexes()
+            logger.info(f"Loaded embeddings and index successfully (version {self.version})")
             return True
             
         except FileNotFoundError:
@@ -120,6 +265,45 @@ class FAQEmbeddings:
             logger.error(f"Error loading embeddings: {str(e)}")
             return False
             
+    def _build_fallback_indexes(self):
+        # Cheap retrieval paths used when the serving tier sheds load away from the encoder
+        self.exact_lookup = {}
+        for faq in self.faqs:
+            for question in [faq['question']] + faq.get('alternative_questions', []):
+                self.exact_lookup.setdefault(exact_match_key(question), faq)
+                
+        if not self.faqs:
+            self.lexical_vectorizer, self.lexical_matrix = None, None
+            return
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        texts = [
+            " ".join([faq['question']] + faq.get('alternative_questions', []) + [faq['answer']])
+            for faq in self.faqs
+        ]
+        self.lexical_vectorizer = TfidfVectorizer(stop_words='english', ngram_range=(1, 2), sublinear_tf=True)
+        self.lexical_matrix = self.lexical_vectorizer.fit_transform(texts)
+        
+    def search_lexical(self, query: str, k: int = 5, threshold: float = 0.1) -> List[Tuple[Dict, float]]:
+        if self.lexical_matrix is None:
+            return []
+        with self.stages.stage('lexical_search'):
+            query_vector = self.lexical_vectorizer.transform([normalize_query(query)])
+            scores = (self.lexical_matrix @ query_vector.T).toarray().ravel()
+            top = np.argsort(-scores)[:k]
+        return [(self.faqs[i], float(scores[i])) for i in top if scores[i] >= threshold]
+        
+    def search_exact(self, query: str) -> List[Tuple[Dict, float]]:
+        faq = self.exact_lookup.get(exact_match_key(query))
+        return [(faq, 1.0)] if faq is not None else []
+        
+    def _compute_version(self) -> str:
+        # Content-derived, so every process that loads the same files reports the same version
+        digest = hashlib.sha1(self.model_name.encode('utf-8'))
+        digest.update(json.dumps(self.faqs, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+        if self.embeddings is not None:
+            digest.update(str(np.asarray(self.embeddings).shape).encode('utf-8'))
+        return digest.hexdigest()[:12]
+        
     def get_category_faqs(self, category: str) -> List[Dict]:
         return [faq for faq in self.faqs if faq.get('category', '').lower() == category.lower()]
         
@@ -0,0 +1,247 @@
+import time
+import hashlib
+import threading
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import List, Dict, Tuple, Iterator, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup
+
+from .categorizer import SCRAPER_CATEGORIZER
+from .corpus_io import read_json, write_json
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = "JupiterFAQBot/0.1 (+https://jupiter.money/help)"
+
+
+def parse_static_faqs(html: str) -> List[Dict]:
+    # Question-like headings followed by an answer sibling; the heuristics the Selenium
+    # scraper falls back to, usable on any HTML string
+    soup = BeautifulSoup(html, 'html.parser')
+
+    faqs = []
+    for heading in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5']):
+        if '?' not in heading.get_text():
+            continue
+        question = heading.get_text().strip()
+        answer_elem = heading.find_next_sibling(['p', 'div', 'span'])
+        answer = answer_elem.get_text().strip() if answer_elem else ""
+        if question and answer and len(answer) > 20:
+            faqs.append({'question': question, 'answer': answer})
+
+    categories = SCRAPER_CATEGORIZER.categorize_batch([faq['question'] for faq in faqs])
+    for faq, category in zip(faqs, categories):
+        faq['category'] = category
+    return faqs
+
+
+class HostLimiter:
+    def __init__(self, max_per_host: int = 2, min_interval: float = 0.5):
+        self.max_per_host = max_per_host
+        self.min_interval = min_interval
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._next_start: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def limit(self, host: str):
+        with self._lock:
+            slots = self._slots.get(host)
+            if slots is None:
+                slots = self._slots[host] = threading.BoundedSemaphore(self.max_per_host)
+        with slots:
+            # Reserve the next start time under the lock so concurrent workers on the same
+            # host space their requests out instead of all sleeping the same interval
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next_start.get(host, now))
+                self._next_start[host] = start + self.min_interval
+            if start > now:
+                time.sleep(start - now)
+            yield
+
+
+def fingerprint(content: bytes) -> str:
+    return hashlib.sha1(content).hexdigest()
+
+
+class CrawlState:
+    # Per-URL validators and fingerprints from the last crawl, plus the FAQs each page
+    # yielded so unchanged pages can be reused without fetching the body or parsing again
+    def __init__(self, filename: str = "data/crawl_state.json"):
+        self.filename = filename
+        self.pages: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        try:
+            self.pages = read_json(self.filename)
+            logger.info(f"Loaded crawl state for {len(self.pages)} pages")
+        except FileNotFoundError:
+            self.pages = {}
+        except ValueError:
+            logger.warning(f"Invalid crawl state in {self.filename}; starting fresh")
+            self.pages = {}
+
+    def get(self, url: str) -> Optional[Dict]:
+        with self._lock:
+            return self.pages.get(url)
+
+    def update(self, url: str, **fields):
+        with self._lock:
+            self.pages.setdefault(url, {}).update(fields)
+
+    def save(self):
+        with self._lock:
+            write_json(self.filename, self.pages)
+
+
+class HTTPScraper:
+    def __init__(self, max_workers: int = 8, max_per_host: int = 2, min_interval: float = 0.5,
+                 timeout: float = 10.0, user_agent: str = DEFAULT_USER_AGENT,
+                 session: Optional[requests.Session] = None):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.limiter = HostLimiter(max_per_host, min_interval)
+
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"User-Agent": user_agent})
+
+    def fetch(self, url: str, previous: Optional[Dict] = None) -> Dict:
+        result = {'url': url, 'status': None, 'html': None, 'error': None, 'elapsed': 0.0,
+                  'not_modified': False, 'etag': None, 'last_modified': None, 'fingerprint': None}
+        headers = {}
+        if previous:
+            # Conditional request: the server answers 304 without a body if nothing changed
+            if previous.get('etag'):
+                headers['If-None-Match'] = previous['etag']
+            if previous.get('last_modified'):
+                headers['If-Modified-Since'] = previous['last_modified']
+
+        start = time.perf_counter()
+        try:
+            with self.limiter.limit(urlsplit(url).netloc):
+                response = self.session.get(url, timeout=self.timeout, headers=headers)
+            result['status'] = response.status_code
+            result['etag'] = response.headers.get('ETag')
+            result['last_modified'] = response.headers.get('Last-Modified')
+            if response.status_code == 304 and previous:
+                result['not_modified'] = True
+                result['etag'] = result['etag'] or previous.get('etag')
+                result['last_modified'] = result['last_modified'] or previous.get('last_modified')
+            elif response.status_code == 200:
+                result['html'] = response.text
+                result['fingerprint'] = fingerprint(response.content)
+            else:
+                result['error'] = f"HTTP {response.status_code}"
+        except requests.RequestException as e:
+            result['error'] = str(e)
+        result['elapsed'] = time.perf_counter() - start
+        return result
+
+    def fetch_all(self, urls: List[str], state: Optional[CrawlState] = None) -> List[Dict]:
+        if not urls:
+            return []
+
+        def fetch(url: str) -> Dict:
+            return self.fetch(url, state.get(url) if state is not None else None)
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(urls))) as pool:
+            return list(pool.map(fetch, urls))
+
+    def iter_pages(self, urls: List[str],
+                   state: Optional[CrawlState] = None) -> Iterator[Tuple[Dict, List[Dict]]]:
+        # Yields (manifest entry, FAQs) per page in input order, each as soon as it and the
+        # pages before it are fetched, so consumers can start before the crawl finishes. At
+        # most 2 * workers pages are in flight or buffered: a consumer that stops pulling
+        # stops the crawl instead of letting fetched HTML pile up
+        if not urls:
+            return
+
+        def fetch(url: str) -> Dict:
+            return self.fetch(url, state.get(url) if state is not None else None)
+
+        workers = min(self.max_workers, len(urls))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for url in urls:
+                pending.append(pool.submit(fetch, url))
+                if len(pending) >= workers * 2:
+                    yield self._process_page(pending.popleft().result(), state)
+            while pending:
+                yield self._process_page(pending.popleft().result(), state)
+
+    def scrape(self, urls: List[str],
+               state: Optional[CrawlState] = None) -> Tuple[List[Dict], List[str], List[Dict]]:
+        # Returns the FAQs found in static HTML, the pages that yielded none (which presumably
+        # render their content with JavaScript) and a per-page manifest. With a crawl state,
+        # pages answering 304 or with an unchanged fingerprint reuse their stored FAQs.
+        faqs = []
+        needs_js = []
+        manifest = []
+        for entry, page_faqs in self.iter_pages(urls, state):
+            manifest.append(entry)
+            faqs.extend(page_faqs)
+            if entry.get('needs_js'):
+                needs_js.append(entry['url'])
+        return faqs, needs_js, manifest
+
+    def _process_page(self, page: Dict, state: Optional[CrawlState]) -> Tuple[Dict, List[Dict]]:
+        url = page['url']
+        previous = state.get(url) if state is not None else None
+        entry = {'url': url, 'status': None, 'faqs': 0, 'fingerprint': page['fingerprint']}
+
+        if page['error']:
+            entry['status'] = 'failed'
+            # A transient error must not read as the page's FAQs being deleted downstream:
+            # serve the last known FAQs and leave the stored state for the next crawl
+            page_faqs = [dict(faq) for faq in previous.get('faqs') or []] if previous else []
+            logger.warning(f"Failed to fetch {url}: {page['error']}; reusing {len(page_faqs)} stored FAQs")
+            entry['faqs'] = len(page_faqs)
+            entry['fingerprint'] = previous.get('fingerprint') if previous else None
+            return entry, page_faqs
+
+        same_content = previous is not None and (
+            page['not_modified'] or page['fingerprint'] == previous.get('fingerprint'))
+        # A page that only ever rendered with JavaScript has no stored FAQs to reuse
+        unchanged = same_content and bool(previous.get('faqs'))
+        if same_content:
+            entry['status'] = 'unchanged'
+            entry['fingerprint'] = previous.get('fingerprint')
+        else:
+            entry['status'] = 'changed' if previous is not None else 'new'
+        if unchanged:
+            page_faqs = [dict(faq) for faq in previous['faqs']]
+        else:
+            page_faqs = parse_static_faqs(page['html']) if page['html'] is not None else []
+        logger.info(f"{url}: {entry['status']}, {len(page_faqs)} FAQs ({page['elapsed']:.2f}s)")
+
+        if state is not None:
+            state.update(url, etag=page['etag'], last_modified=page['last_modified'],
+                         fingerprint=entry['fingerprint'], checked_at=time.time())
+
+        for faq in page_faqs:
+            faq['source_url'] = url
+        # Stored even when empty: a changed page must not keep its old FAQs under the new
+        # fingerprint, or the next crawl would serve them as "unchanged"
+        if state is not None and not unchanged:
+            state.update(url, faqs=page_faqs)
+        if page_faqs:
+            entry['faqs'] = len(page_faqs)
+        else:
+            entry['needs_js'] = True
+        return entry, page_faqs
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,214 @@
+import os
+import json
+import time
+import random
+import threading
+import logging
+from typing import List, Dict, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    pass
+
+
+class CircuitOpenError(LLMError):
+    pass
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            # Half-open: let a single probe through, everyone else short-circuits
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def release_probe(self):
+        # Neutral outcome: the request never reached (or never finished talking to) the
+        # upstream, so free the half-open probe without moving the breaker either way
+        with self._lock:
+            self._probe_in_flight = False
+
+    def is_open(self) -> bool:
+        with self._lock:
+            return self.state == self.OPEN and time.monotonic() - self.opened_at < self.reset_timeout
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("LLM circuit closed")
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"LLM circuit opened after {self.consecutive_failures} consecutive failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class LLMClient:
+    def __init__(self, api_key: str, base_url: Optional[str] = None, model: str = "gpt-3.5-turbo",
+                 timeout: float = 15.0, max_retries: int = 2, backoff_base: float = 0.5,
+                 backoff_max: float = 4.0, max_concurrency: int = 8,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.base_url = (base_url or os.getenv('OPENAI_BASE_URL') or "https://api.openai.com/v1").rstrip('/')
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_concurrency = max_concurrency
+        self.breaker = breaker or CircuitBreaker()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        })
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+    def available(self) -> bool:
+        return not self.breaker.is_open()
+
+    def chat(self, messages: List[Dict], max_tokens: int = 300, temperature: float = 0.7) -> str:
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        }
+        response = self._request("/chat/completions", payload)
+        return response.json()["choices"][0]["message"]["content"].strip()
+
+    def stream_chat(self, messages: List[Dict], max_tokens: int = 300,
+                    temperature: float = 0.7) -> Iterator[str]:
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": True
+        }
+        response = self._request("/chat/completions", payload, stream=True)
+        # The connection slot stays held until the stream is exhausted or the generator is
+        # closed; closing the response drops the upstream connection so the LLM stops generating
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+                if delta:
+                    yield delta
+            self.breaker.record_success()
+        except (requests.RequestException, ValueError, KeyError, IndexError) as e:
+            self.breaker.record_failure()
+            raise LLMError(f"LLM stream failed: {str(e)}")
+        except BaseException:
+            # Closed early (GeneratorExit when the client disconnects): no verdict on upstream
+            # health, but a half-open probe has to be released or the breaker never leaves half-open
+            self.breaker.release_probe()
+            raise
+        finally:
+            response.close()
+            self._slots.release()
+
+    def _request(self, path: str, payload: Dict, stream: bool = False) -> requests.Response:
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow_request():
+                raise CircuitOpenError("LLM circuit breaker is open")
+            if not self._slots.acquire(timeout=self.timeout):
+                # This request may hold the half-open probe; never sent, it proves nothing
+                self.breaker.release_probe()
+                raise LLMError("Timed out waiting for a free LLM connection slot")
+
+            retry_after = None
+            keep_slot = False
+            try:
+                response = self.session.post(self.base_url + path, json=payload,
+                                             timeout=self.timeout, stream=stream)
+            except requests.RequestException as e:
+                last_error = LLMError(f"LLM request failed: {str(e)}")
+                self.breaker.record_failure()
+            else:
+                if response.status_code == 200:
+                    if not stream:
+                        self.breaker.record_success()
+                    keep_slot = stream
+                    return response
+
+                last_error = LLMError(f"LLM returned HTTP {response.status_code}: {response.text[:200]}")
+                response.close()
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    # Client errors say nothing about upstream health: neither reset the
+                    # failure count nor close a half-open breaker, just free the probe
+                    self.breaker.release_probe()
+                    raise last_error
+                self.breaker.record_failure()
+                retry_after = self._parse_retry_after(response.headers.get("Retry-After"))
+            finally:
+                if not keep_slot:
+                    self._slots.release()
+
+            if attempt < self.max_retries:
+                delay = self._backoff(attempt, retry_after)
+                logger.warning(f"{str(last_error)}; retrying in {delay:.2f}s")
+                time.sleep(delay)
+
+        raise last_error
+
+    def _backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        # Full jitter keeps retries from a brownout from arriving in lockstep
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _parse_retry_after(self, value: Optional[str]) -> Optional[float]:
+        try:
+            return float(value) if value else None
+        except ValueError:
+            return None
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,243 @@
+import time
+import threading
+import logging
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import List, Dict, Tuple, Optional, Callable, Sequence
+
+from .tracing import span
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+StageListener = Callable[[str, float, Optional[Exception]], None]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Tuple) -> Tuple:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {labels}")
+        return tuple(str(label) for label in labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1.0):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, *labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._functions: Dict[Tuple, Callable[[], float]] = {}
+
+    def set(self, value: float, *labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def set_function(self, function: Callable[[], float], *labels):
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = function
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+            functions = dict(self._functions)
+        for key, function in functions.items():
+            try:
+                values[key] = float(function())
+            except Exception as e:
+                logger.debug(f"Gauge {self.name} callback failed: {str(e)}")
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in sorted(values.items())]
+
+
+class Histogram(_Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts..., +Inf count], sum
+        self._series: Dict[Tuple, List] = {}
+
+    def observe(self, value: float, *labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            snapshot = {key: (list(counts), total) for key, (counts, total) in self._series.items()}
+        lines = []
+        for key, (counts, total) in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_DURATION = REGISTRY.histogram(
+    "faq_stage_duration_seconds", "Time spent in each request stage", ["stage"])
+STAGE_ERRORS = REGISTRY.counter(
+    "faq_stage_errors_total", "Exceptions raised inside a request stage", ["stage", "error"])
+QUERIES = REGISTRY.counter(
+    "faq_queries_total", "Queries received by the bot", ["mode"])
+CACHE_REQUESTS = REGISTRY.counter(
+    "faq_cache_requests_total", "Cache lookups by outcome", ["cache", "result"])
+CACHE_HIT_RATIO = REGISTRY.gauge(
+    "faq_cache_hit_ratio", "Fraction of cache lookups that were hits", ["cache"])
+LLM_CIRCUIT_OPEN = REGISTRY.gauge(
+    "faq_llm_circuit_open", "1 while the LLM circuit breaker is open")
+WARMUP_SECONDS = REGISTRY.gauge(
+    "faq_warmup_seconds", "Duration of the startup warmup")
+PROCESS_MEMORY = REGISTRY.gauge(
+    "faq_process_memory_bytes", "Memory of this serving process from /proc smaps_rollup", ["kind"])
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "faq_http_request_duration_seconds", "HTTP request latency", ["method", "route", "status"])
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    CACHE_REQUESTS.inc(cache, "hit" if hit else "miss")
+
+
+def cache_hit_ratio(cache: str) -> float:
+    hits = CACHE_REQUESTS.value(cache, "hit")
+    total = hits + CACHE_REQUESTS.value(cache, "miss")
+    return hits / total if total else 0.0
+
+
+def observe_stage(stage: str, seconds: float, error: Optional[Exception]):
+    STAGE_DURATION.observe(seconds, stage)
+    if error is not None:
+        STAGE_ERRORS.inc(stage, type(error).__name__)
+
+
+class StageTimer:
+    def __init__(self, listeners: Optional[List[StageListener]] = None):
+        self.listeners: List[StageListener] = list(listeners or [])
+
+    def add_listener(self, listener: StageListener):
+        self.listeners.append(listener)
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        error = None
+        try:
+            # Also a span of the current request trace, if there is one
+            with span(name):
+                yield
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            for listener in self.listeners:
+                listener(name, elapsed, error)
+
+
+CACHE_HIT_RATIO.set_function(lambda: cache_hit_ratio("query_embedding"), "query_embedding")
@@ -0,0 +1,169 @@
+import os
+import json
+import time
+import hashlib
+import logging
+from contextlib import nullcontext
+from typing import List, Dict, Callable, Iterable, Optional
+
+from .profiling import measure
+from .corpus_io import read_json, write_json
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> Optional[str]:
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Stage:
+    def __init__(self, name: str, run: Callable[[], Optional[Dict]], inputs: Iterable[str] = (),
+                 outputs: Iterable[str] = (), params: Optional[Dict] = None, code: Iterable[str] = (),
+                 deps: Iterable[str] = (), volatile: bool = False):
+        self.name = name
+        self.run = run
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.params = params or {}
+        # Source files whose contents count as the stage's code version
+        self.code = list(code)
+        self.deps = list(deps)
+        # Volatile stages read the outside world (e.g. a crawl) and can't be fingerprinted
+        # by their inputs; they always run and let downstream stages skip on unchanged output
+        self.volatile = volatile
+
+
+class PipelineRunner:
+    def __init__(self, stages: List[Stage], state_file: str = "data/.pipeline_state.json"):
+        self.stages = self._ordered(stages)
+        self.state_file = state_file
+        self.state = self._load_state()
+
+    def fingerprint(self, stage: Stage) -> str:
+        payload = {
+            'params': stage.params,
+            'inputs': {path: file_digest(path) for path in stage.inputs},
+            'code': {path: file_digest(os.path.join(PROJECT_ROOT, path)) for path in stage.code}
+        }
+        return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def stale_reason(self, stage: Stage) -> Optional[str]:
+        if stage.volatile:
+            return "volatile"
+        previous = self.state.get(stage.name)
+        if previous is None:
+            return "no previous run"
+        if previous.get('fingerprint') != self.fingerprint(stage):
+            return "inputs, parameters or code changed"
+        for path in stage.outputs:
+            if file_digest(path) != previous.get('outputs', {}).get(path):
+                return f"output {path} missing or modified"
+        return None
+
+    def run(self, selected: Optional[Iterable[str]] = None, force: bool = False,
+            force_stages: Iterable[str] = (), dry_run: bool = False, profile: bool = False,
+            profile_dir: Optional[str] = None, trace_memory: bool = False) -> Dict[str, Dict]:
+        # With profile, every stage that runs gets a 'profile' entry (wall/CPU time, peak
+        # memory, throughput); profile_dir additionally keeps a cProfile dump per stage
+        names = [stage.name for stage in self.stages]
+        selected = set(selected or names)
+        force_stages = set(force_stages)
+        unknown = (selected | force_stages) - set(names)
+        if unknown:
+            raise ValueError(f"Unknown pipeline stage(s): {', '.join(sorted(unknown))}")
+
+        results: Dict[str, Dict] = {}
+        for stage in self.stages:
+            if stage.name not in selected:
+                results[stage.name] = {'status': 'not_selected'}
+                continue
+
+            reason = "forced" if force or stage.name in force_stages else self.stale_reason(stage)
+            if reason is None:
+                logger.info(f"Stage {stage.name}: up to date, skipping")
+                results[stage.name] = {'status': 'skipped'}
+                continue
+            if dry_run:
+                logger.info(f"Stage {stage.name}: would run ({reason})")
+                results[stage.name] = {'status': 'stale', 'reason': reason}
+                continue
+
+            logger.info(f"Stage {stage.name}: running ({reason})")
+            fingerprint = self.fingerprint(stage)
+            if profile or profile_dir:
+                profile_file = os.path.join(profile_dir, f"{stage.name}.prof") if profile_dir else None
+                measured = measure(stage.name, profile_file=profile_file, trace_memory=trace_memory)
+            else:
+                measured = nullcontext({})
+            start = time.perf_counter()
+            try:
+                with measured as stage_profile:
+                    details = stage.run() or {}
+            except Exception as e:
+                logger.error(f"Stage {stage.name} failed: {str(e)}")
+                results[stage.name] = {'status': 'failed', 'reason': reason, 'error': str(e),
+                                       'seconds': time.perf_counter() - start}
+                if stage_profile:
+                    results[stage.name]['profile'] = stage_profile
+                break
+            elapsed = time.perf_counter() - start
+            if stage_profile:
+                items = details.get('items')
+                if items is not None and stage_profile['wall_seconds'] > 0:
+                    stage_profile['items_per_second'] = round(items / stage_profile['wall_seconds'], 2)
+                details = dict(details, profile=stage_profile)
+
+            self.state[stage.name] = {
+                'fingerprint': fingerprint,
+                'outputs': {path: file_digest(path) for path in stage.outputs},
+                'completed_at': time.strftime("%Y-%m-%dT%H:%M:%S"),
+                'seconds': round(elapsed, 3)
+            }
+            self._save_state()
+            results[stage.name] = dict(details, status='ran', reason=reason, seconds=elapsed)
+            logger.info(f"Stage {stage.name}: done in {elapsed:.2f}s")
+        return results
+
+    def _ordered(self, stages: List[Stage]) -> List[Stage]:
+        # Topological order, keeping the declared order among independent stages
+        by_name = {stage.name: stage for stage in stages}
+        ordered, visiting, done = [], set(), set()
+
+        def visit(stage: Stage):
+            if stage.name in done:
+                return
+            if stage.name in visiting:
+                raise ValueError(f"Pipeline has a dependency cycle through {stage.name}")
+            visiting.add(stage.name)
+            for dep in stage.deps:
+                if dep not in by_name:
+                    raise ValueError(f"Stage {stage.name} depends on unknown stage {dep}")
+                visit(by_name[dep])
+            visiting.discard(stage.name)
+            done.add(stage.name)
+            ordered.append(stage)
+
+        for stage in stages:
+            visit(stage)
+        return ordered
+
+    def _load_state(self) -> Dict:
+        try:
+            return read_json(self.state_file)
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            logger.warning(f"Invalid pipeline state in {self.state_file}; treating all stages as stale")
+            return {}
+
+    def _save_state(self):
+        write_json(self.state_file, self.state)
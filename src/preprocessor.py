@@ -1,112 +1,167 @@
+import os
 import json
 import re
+import pickle
+import hashlib
 import pandas as pd
-from typing import List, Dict, Set
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import numpy as np
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Set, Iterator, Optional
 import logging
 
+from .dedup import find_duplicate_groups, IncrementalDeduplicator
+from .categorizer import FAQ_CATEGORIZER
+from .corpus_io import (read_records, write_records, write_json, atomic_write, iter_jsonl,
+                        read_record_chunks, write_lines)
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Compiled once per process; workers inherit them instead of going through re's cache per call
+TAG_PATTERN = re.compile(r'<[^>]+>')
+ENTITY_PATTERN = re.compile(r'&[a-zA-Z]+;')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+PUNCTUATION_PATTERN = re.compile(r'[^\w\s?]')
+
+MIN_QUESTION_LENGTH = 10
+MIN_ANSWER_LENGTH = 20
+
+
+def clean_text(text: str) -> str:
+    if not text:
+        return ""
+    text = TAG_PATTERN.sub('', text)
+    text = ENTITY_PATTERN.sub('', text)
+    text = WHITESPACE_PATTERN.sub(' ', text)
+    return text.strip()
+
+
+def categorize_faqs(faqs: List[Dict]) -> List[str]:
+    # Classify every FAQ without a specific category in one matcher pass
+    pending = [i for i, faq in enumerate(faqs)
+               if not faq.get('category') or faq.get('category') == 'General']
+    categories = [faq.get('category') for faq in faqs]
+    texts = [faqs[i]['question'] + " " + faqs[i]['answer'] for i in pending]
+    for i, category in zip(pending, FAQ_CATEGORIZER.categorize_batch(texts)):
+        categories[i] = category
+    return categories
+
+
+def clean_faqs(raw_faqs: List[Dict]) -> List[Optional[Dict]]:
+    # One cleaned record per raw FAQ, None where it is incomplete or too short
+    results: List[Optional[Dict]] = [None] * len(raw_faqs)
+    complete = [i for i, faq in enumerate(raw_faqs) if faq.get('question') and faq.get('answer')]
+    categories = categorize_faqs([raw_faqs[i] for i in complete])
+
+    for i, category in zip(complete, categories):
+        question = clean_text(raw_faqs[i]['question'])
+        answer = clean_text(raw_faqs[i]['answer'])
+        if len(question) > MIN_QUESTION_LENGTH and len(answer) > MIN_ANSWER_LENGTH:
+            results[i] = {'question': question, 'answer': answer, 'category': category}
+    return results
+
+
+def clean_faq_chunk(raw_faqs: List[Dict]) -> List[Dict]:
+    # Clean, categorize and filter one chunk; module-level so a process pool can pickle it
+    return [faq for faq in clean_faqs(raw_faqs) if faq is not None]
+
+
+def normalize_question(question: str) -> str:
+    question = clean_text(question).lower()
+    question = PUNCTUATION_PATTERN.sub('', question)
+    if not question.endswith('?'):
+        question += '?'
+    return question.strip()
+
+
+def faq_id(faq: Dict) -> str:
+    # Stable across answer edits: an explicit id, else the normalized question
+    if faq.get('id'):
+        return str(faq['id'])
+    return hashlib.sha1(normalize_question(faq.get('question') or '').encode('utf-8')).hexdigest()[:16]
+
+
+def content_hash(record: Dict) -> str:
+    return hashlib.sha1(json.dumps(record, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def map_chunks(function, chunks: Iterator[List[Dict]], workers: int, mp_context=None) -> Iterator[tuple]:
+    # Yields (input_size, result) in input order with at most 2 * workers chunks in flight,
+    # so memory stays flat however large the input is. Each time a chunk arrives, any finished
+    # results at the head are yielded too, so a slow producer holds them back by at most one chunk
+    if workers <= 1:
+        for chunk in chunks:
+            yield len(chunk), function(chunk)
+        return
+
+    # Callers with live threads pass a forkserver/spawn context: forking them is unsafe
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append((len(chunk), pool.submit(function, chunk)))
+            while pending and (len(pending) >= workers * 2 or pending[0][1].done()):
+                size, future = pending.popleft()
+                yield size, future.result()
+        while pending:
+            size, future = pending.popleft()
+            yield size, future.result()
+
+
+CACHE_FORMAT = 1
+
+
+def _cache_version() -> str:
+    # Cached records are only valid for the code that produced them: editing the cleaning,
+    # categorization or dedup modules invalidates the cache without a manual bump
+    digest = hashlib.sha1(str(CACHE_FORMAT).encode('utf-8'))
+    for module in ("preprocessor.py", "categorizer.py", "dedup.py"):
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), module), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+CACHE_VERSION = _cache_version()
+
+
 class FAQPreprocessor:
     def __init__(self):
         self.processed_faqs = []
         self.categories = set()
+        self.changeset = {}
         
-    def load_raw_faqs(self, filename: str = "data/raw_faqs.json") -> List[Dict]:
+    def load_raw_faqs(self, filename: str = "data/raw_faqs.jsonl") -> List[Dict]:
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                faqs = json.load(f)
+            faqs = read_records(filename)
             logger.info(f"Loaded {len(faqs)} raw FAQs")
             return faqs
         except FileNotFoundError:
             logger.error(f"File {filename} not found")
             return []
-        except json.JSONDecodeError:
+        except ValueError:
             logger.error(f"Invalid JSON in {filename}")
             return []
             
     def clean_text(self, text: str) -> str:
-        if not text:
-            return ""
-            
-        text = re.sub(r'<[^>]+>', '', text)
-        
-        text = re.sub(r'&[a-zA-Z]+;', '', text)
-        
-        text = re.sub(r'\s+', ' ', text)
-        
-        text = text.strip()
-        
-        return text
+        return clean_text(text)
         
     def normalize_question(self, question: str) -> str:
-        question = self.clean_text(question)
-        
-        question = question.lower()
-        
-        question = re.sub(r'[^\w\s?]', '', question)
-        
-        if not question.endswith('?'):
-            question += '?'
-            
-        return question.strip()
+        return normalize_question(question)
         
     def categorize_faq(self, question: str, answer: str, existing_category: str = None) -> str:
         if existing_category and existing_category != 'General':
             return existing_category
             
-        text = (question + " " + answer).lower()
-        
-        category_keywords = {
-            'Payments': ['payment', 'pay', 'money', 'transfer', 'transaction', 'upi', 'neft', 'imps', 'send money'],
-            'KYC': ['kyc', 'verification', 'document', 'identity', 'verify', 'aadhar', 'pan', 'passport'],
-            'Rewards': ['reward', 'cashback', 'points', 'benefit', 'earn', 'redeem', 'offer'],
-            'Cards': ['card', 'debit', 'credit', 'atm', 'pin', 'activate'],
-            'Limits': ['limit', 'maximum', 'minimum', 'daily limit', 'monthly limit'],
-            'Account': ['account', 'balance', 'statement', 'profile', 'settings'],
-            'Security': ['security', 'password', 'otp', 'fraud', 'safe', 'secure']
-        }
+        return FAQ_CATEGORIZER.categorize(question + " " + answer)
         
-        category_scores = {}
-        for category, keywords in category_keywords.items():
-            score = sum(1 for keyword in keywords if keyword in text)
-            if score > 0:
-                category_scores[category] = score
-                
-        if category_scores:
-            return max(category_scores, key=category_scores.get)
-        else:
-            return 'General'
+    def categorize_faqs(self, faqs: List[Dict]) -> List[str]:
+        return categorize_faqs(faqs)
             
-    def find_similar_questions(self, faqs: List[Dict], threshold: float = 0.8) -> List[List[int]]:
+    def find_similar_questions(self, faqs: List[Dict], threshold: float = 0.8,
+                               top_k: int = 50) -> List[List[int]]:
         questions = [faq['question'] for faq in faqs]
         
-        vectorizer = TfidfVectorizer(stop_words='english', ngram_range=(1, 2))
-        tfidf_matrix = vectorizer.fit_transform(questions)
-        
-        similarity_matrix = cosine_similarity(tfidf_matrix)
-        
-        similar_groups = []
-        processed_indices = set()
-        
-        for i in range(len(questions)):
-            if i in processed_indices:
-                continue
-                
-            similar_indices = [i]
-            for j in range(i + 1, len(questions)):
-                if j not in processed_indices and similarity_matrix[i][j] >= threshold:
-                    similar_indices.append(j)
-                    processed_indices.add(j)
-                    
-            if len(similar_indices) > 1:
-                similar_groups.append(similar_indices)
-                processed_indices.update(similar_indices)
-                
-        return similar_groups
+        # Sparse top-k neighbour search plus union-find instead of a dense n x n matrix
+        return find_duplicate_groups(questions, threshold=threshold, top_k=top_k)
         
     def merge_similar_faqs(self, faqs: List[Dict], similar_groups: List[List[int]]) -> List[Dict]:
         merged_faqs = []
@@ -129,6 +184,8 @@ class FAQPreprocessor:
                 'category': primary_faq['category'],
                 'alternative_questions': all_questions[1:] if len(all_questions) > 1 else []
             }
+            if 'id' in primary_faq:
+                merged_faq['id'] = primary_faq['id']
             
             merged_faqs.append(merged_faq)
             merged_indices.update(group)
@@ -140,32 +197,15 @@ class FAQPreprocessor:
                 
         return merged_faqs
         
-    def process_faqs(self, raw_faqs: List[Dict]) -> List[Dict]:
+    def process_faqs(self, raw_faqs: List[Dict], threshold: float = 0.8) -> List[Dict]:
         logger.info("Starting FAQ preprocessing...")
         
-        processed_faqs = []
-        
-        for faq in raw_faqs:
-            if not faq.get('question') or not faq.get('answer'):
-                continue
-                
-            processed_faq = {
-                'question': self.clean_text(faq['question']),
-                'answer': self.clean_text(faq['answer']),
-                'category': self.categorize_faq(
-                    faq['question'], 
-                    faq['answer'], 
-                    faq.get('category')
-                )
-            }
-            
-            if len(processed_faq['question']) > 10 and len(processed_faq['answer']) > 20:
-                processed_faqs.append(processed_faq)
-                self.categories.add(processed_faq['category'])
+        processed_faqs = clean_faq_chunk(raw_faqs)
+        self.categories.update(faq['category'] for faq in processed_faqs)
                 
         logger.info(f"Cleaned {len(processed_faqs)} FAQs")
         
-        similar_groups = self.find_similar_questions(processed_faqs)
+        similar_groups = self.find_similar_questions(processed_faqs, threshold=threshold)
         logger.info(f"Found {len(similar_groups)} groups of similar questions")
         
         merged_faqs = self.merge_similar_faqs(processed_faqs, similar_groups)
@@ -175,6 +215,179 @@ class FAQPreprocessor:
         
         return merged_faqs
         
+    def process_faqs_incremental(self, raw_faqs: List[Dict], cache_file: str = "data/preprocess_cache.pkl",
+                                 threshold: float = 0.8, full: bool = False) -> List[Dict]:
+        # Reprocesses only raw FAQs whose content hash changed since the cached run and
+        # updates the dedup groups in place. Output records carry an 'id' and
+        # self.changeset lists the output ids that were added, changed or removed.
+        logger.info("Starting incremental FAQ preprocessing...")
+        cache = None if full else self._load_cache(cache_file)
+        if cache is not None and cache['threshold'] != threshold:
+            logger.info("Dedup threshold changed; rebuilding from scratch")
+            cache = None
+        if cache is None:
+            cache = {
+                'version': CACHE_VERSION,
+                'threshold': threshold,
+                'entries': {},
+                'outputs': {},
+                'dedup': IncrementalDeduplicator(threshold=threshold)
+            }
+        entries = cache['entries']
+        
+        ids: List[str] = []
+        hashes: Dict[str, str] = {}
+        pending: List[int] = []
+        seen: Dict[str, int] = {}
+        for i, faq in enumerate(raw_faqs):
+            base_id = faq_id(faq)
+            # Repeated questions keep distinct ids in input order
+            seen[base_id] = seen.get(base_id, 0) + 1
+            item_id = base_id if seen[base_id] == 1 else f"{base_id}-{seen[base_id]}"
+            ids.append(item_id)
+            hashes[item_id] = content_hash({key: faq.get(key) for key in ('question', 'answer', 'category')})
+            if item_id not in entries or entries[item_id]['hash'] != hashes[item_id]:
+                pending.append(i)
+                
+        removed = [item_id for item_id in entries if item_id not in hashes]
+        added = [ids[i] for i in pending if ids[i] not in entries]
+        logger.info(f"Raw FAQs: {len(added)} new, {len(pending) - len(added)} changed, "
+                    f"{len(removed)} removed, {len(ids) - len(pending)} unchanged")
+        
+        for i, record in zip(pending, clean_faqs([raw_faqs[i] for i in pending])):
+            if record is not None:
+                record = dict(record, id=ids[i])
+            entries[ids[i]] = {'hash': hashes[ids[i]], 'record': record}
+        for item_id in removed:
+            del entries[item_id]
+            
+        valid_ids = [item_id for item_id in ids if entries[item_id]['record'] is not None]
+        records = [dict(entries[item_id]['record']) for item_id in valid_ids]
+        self.categories.update(record['category'] for record in records)
+        
+        dedup = cache['dedup']
+        mode = dedup.sync({record['id']: record['question'] for record in records})
+        position = {item_id: i for i, item_id in enumerate(valid_ids)}
+        similar_groups = [[position[item_id] for item_id in group] for group in dedup.groups(valid_ids)]
+        logger.info(f"Dedup ({mode}): {len(similar_groups)} groups of similar questions")
+        
+        merged_faqs = self.merge_similar_faqs(records, similar_groups)
+        
+        outputs = {faq['id']: content_hash(faq) for faq in merged_faqs}
+        previous = cache['outputs']
+        self.changeset = {
+            'added': [item_id for item_id in outputs if item_id not in previous],
+            'changed': [item_id for item_id in outputs if item_id in previous and previous[item_id] != outputs[item_id]],
+            'removed': [item_id for item_id in previous if item_id not in outputs],
+            'dedup': mode
+        }
+        cache['outputs'] = outputs
+        self._save_cache(cache, cache_file)
+        
+        logger.info(f"After merging: {len(merged_faqs)} unique FAQs "
+                    f"({len(self.changeset['added'])} added, {len(self.changeset['changed'])} changed, "
+                    f"{len(self.changeset['removed'])} removed)")
+        self.processed_faqs = merged_faqs
+        
+        return merged_faqs
+        
+    def save_changeset(self, filename: str = "data/changeset.json"):
+        write_json(filename, self.changeset)
+        logger.info(f"Changeset saved to {filename}")
+        
+    def _load_cache(self, cache_file: str) -> Optional[Dict]:
+        if not os.path.exists(cache_file):
+            return None
+        try:
+            with open(cache_file, 'rb') as f:
+                cache = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable preprocessing cache {cache_file}: {str(e)}")
+            return None
+        if cache.get('version') != CACHE_VERSION:
+            logger.info("Preprocessing code or cache format changed; rebuilding from scratch")
+            return None
+        return cache
+        
+    def _save_cache(self, cache: Dict, cache_file: str):
+        with atomic_write(cache_file, 'wb') as f:
+            pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+        
+    def process_faqs_stream(self, input_file: str = "data/raw_faqs.jsonl",
+                            output_file: str = "data/processed_faqs.jsonl", chunk_size: int = 1000,
+                            workers: Optional[int] = None, threshold: float = 0.8) -> Dict:
+        # Same output as process_faqs + merge, written as JSONL without holding the corpus:
+        # chunks are cleaned across a process pool and spilled to disk, then dedup runs as
+        # one global pass over the questions and the merge re-streams the spill file
+        workers = workers or os.cpu_count() or 1
+        os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+        cleaned_file = output_file + ".cleaned.tmp"
+        logger.info(f"Streaming FAQ preprocessing from {input_file} with {workers} worker(s)...")
+        
+        questions: List[str] = []
+        categories: List[str] = []
+        answer_lengths: List[int] = []
+        raw_count = 0
+        
+        try:
+            with open(cleaned_file, 'w', encoding='utf-8') as out:
+                for size, cleaned in map_chunks(clean_faq_chunk, read_record_chunks(input_file, chunk_size), workers):
+                    raw_count += size
+                    write_lines(out, cleaned)
+                    for faq in cleaned:
+                        questions.append(faq['question'])
+                        categories.append(faq['category'])
+                        answer_lengths.append(len(faq['answer']))
+            logger.info(f"Cleaned {len(questions)} of {raw_count} raw FAQs")
+            
+            similar_groups = find_duplicate_groups(questions, threshold=threshold)
+            logger.info(f"Found {len(similar_groups)} groups of similar questions")
+            
+            # Ties keep the earliest answer, as max() over the group's answers did
+            longest = [max(group, key=answer_lengths.__getitem__) for group in similar_groups]
+            needed = set(longest)
+            grouped = {i for group in similar_groups for i in group}
+            answers = {}
+            if needed:
+                for i, faq in enumerate(iter_jsonl(cleaned_file)):
+                    if i in needed:
+                        answers[i] = faq['answer']
+            
+            category_counts: Dict[str, int] = {}
+            written = 0
+            with atomic_write(output_file) as out:
+                for group, answer_index in zip(similar_groups, longest):
+                    write_lines(out, [{
+                        'question': questions[group[0]],
+                        'answer': answers[answer_index],
+                        'category': categories[group[0]],
+                        'alternative_questions': [questions[i] for i in group[1:]]
+                    }])
+                    category_counts[categories[group[0]]] = category_counts.get(categories[group[0]], 0) + 1
+                    written += 1
+                for i, faq in enumerate(iter_jsonl(cleaned_file)):
+                    if i in grouped:
+                        continue
+                    faq['alternative_questions'] = []
+                    write_lines(out, [faq])
+                    category_counts[faq['category']] = category_counts.get(faq['category'], 0) + 1
+                    written += 1
+        finally:
+            if os.path.exists(cleaned_file):
+                os.remove(cleaned_file)
+                    
+        self.categories.update(category_counts)
+        logger.info(f"After merging: {written} unique FAQs written to {output_file}")
+        logger.info(f"Category distribution: {category_counts}")
+        
+        return {
+            'raw': raw_count,
+            'cleaned': len(questions),
+            'groups': len(similar_groups),
+            'written': written,
+            'categories': category_counts
+        }
+        
     def get_category_stats(self) -> Dict[str, int]:
         category_counts = {}
         for faq in self.processed_faqs:
@@ -182,12 +395,8 @@ class FAQPreprocessor:
             category_counts[category] = category_counts.get(category, 0) + 1
         return category_counts
         
-    def save_processed_faqs(self, filename: str = "data/processed_faqs.json"):
-        import os
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
-        
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(self.processed_faqs, f, indent=2, ensure_ascii=False)
+    def save_processed_faqs(self, filename: str = "data/processed_faqs.jsonl"):
+        write_records(filename, self.processed_faqs)
             
         logger.info(f"Processed FAQs saved to {filename}")
         
@@ -195,13 +404,46 @@ class FAQPreprocessor:
         logger.info(f"Category distribution: {stats}")
 
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Clean, categorize and deduplicate raw FAQs")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Reprocess only new or changed FAQs using the content-hash cache")
+    parser.add_argument("--full", action="store_true", help="Ignore the cache for --incremental and rebuild it")
+    parser.add_argument("--cache", default="data/preprocess_cache.pkl", help="Cache file for --incremental")
+    parser.add_argument("--changeset", default="data/changeset.json", help="Changeset output for --incremental")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream JSONL input through a process pool and write JSONL output")
+    parser.add_argument("--input", default="data/raw_faqs.jsonl",
+                        help="Raw FAQ file; .jsonl or .json, optionally .gz")
+    parser.add_argument("--output", default="data/processed_faqs.jsonl",
+                        help="Processed FAQ file; .jsonl or .json, optionally .gz")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for --stream (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="FAQs per worker task for --stream")
+    args = parser.parse_args()
+    
     preprocessor = FAQPreprocessor()
-    raw_faqs = preprocessor.load_raw_faqs()
     
-    if raw_faqs:
-        processed_faqs = preprocessor.process_faqs(raw_faqs)
-        preprocessor.save_processed_faqs()
-        print(f"Processed {len(processed_faqs)} FAQs")
-        print(f"Categories: {preprocessor.get_category_stats()}")
+    if args.stream:
+        summary = preprocessor.process_faqs_stream(
+            args.input,
+            args.output,
+            chunk_size=args.chunk_size,
+            workers=args.workers
+        )
+        print(f"Processed {summary['written']} FAQs from {summary['raw']} raw records")
+        print(f"Categories: {summary['categories']}")
     else:
-        print("No FAQs to process")
+        raw_faqs = preprocessor.load_raw_faqs(args.input)
+        
+        if raw_faqs:
+            if args.incremental:
+                processed_faqs = preprocessor.process_faqs_incremental(raw_faqs, args.cache, full=args.full)
+                preprocessor.save_changeset(args.changeset)
+            else:
+                processed_faqs = preprocessor.process_faqs(raw_faqs)
+            preprocessor.save_processed_faqs(args.output)
+            print(f"Processed {len(processed_faqs)} FAQs")
+            print(f"Categories: {preprocessor.get_category_stats()}")
+        else:
+            print("No FAQs to process")
@@ -0,0 +1,135 @@
+import os
+import sys
+import time
+import platform
+import resource
+import cProfile
+import tracemalloc
+import logging
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from .corpus_io import write_json
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _read_status_kb(field: str) -> Optional[int]:
+    try:
+        with open("/proc/self/status", 'r') as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _reset_peak_rss() -> bool:
+    # Writing 5 to clear_refs resets VmHWM (Linux >= 4.0) so the peak covers just one stage
+    try:
+        with open("/proc/self/clear_refs", 'w') as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _cpu_seconds() -> Dict[str, float]:
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return {
+        'user': own.ru_utime,
+        'system': own.ru_stime,
+        # Worker processes (e.g. the preprocessing pool) are only counted once reaped
+        'children': children.ru_utime + children.ru_stime
+    }
+
+
+@contextmanager
+def measure(name: str, profile_file: Optional[str] = None, trace_memory: bool = False):
+    # Yields a dict that is filled with wall/CPU time and peak memory when the block exits
+    report: Dict = {}
+    per_stage_peak = _reset_peak_rss()
+    rss_before = _read_status_kb("VmRSS")
+    if trace_memory:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+    profiler = cProfile.Profile() if profile_file else None
+
+    cpu_before = _cpu_seconds()
+    start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield report
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        wall = time.perf_counter() - start
+        cpu_after = _cpu_seconds()
+
+        report['wall_seconds'] = round(wall, 4)
+        report['cpu_user_seconds'] = round(cpu_after['user'] - cpu_before['user'], 4)
+        report['cpu_system_seconds'] = round(cpu_after['system'] - cpu_before['system'], 4)
+        report['cpu_children_seconds'] = round(cpu_after['children'] - cpu_before['children'], 4)
+        cpu_total = report['cpu_user_seconds'] + report['cpu_system_seconds'] + report['cpu_children_seconds']
+        report['cpu_utilization'] = round(cpu_total / wall, 3) if wall > 0 else None
+
+        peak_kb = _read_status_kb("VmHWM") if per_stage_peak else None
+        if peak_kb is None:
+            # ru_maxrss is the lifetime peak of the process, not of this stage
+            peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        report['peak_rss_bytes'] = peak_kb * 1024
+        report['peak_rss_scope'] = "stage" if per_stage_peak else "process"
+        rss_after = _read_status_kb("VmRSS")
+        if rss_before is not None and rss_after is not None:
+            report['rss_delta_bytes'] = (rss_after - rss_before) * 1024
+
+        if trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            report['python_peak_bytes'] = peak
+            report['python_retained_bytes'] = current
+
+        if profiler is not None:
+            os.makedirs(os.path.dirname(profile_file) or '.', exist_ok=True)
+            profiler.dump_stats(profile_file)
+            report['profile_file'] = profile_file
+
+        logger.info(f"Profile {name}: {report['wall_seconds']:.2f}s wall, {cpu_total:.2f}s CPU, "
+                    f"peak RSS {report['peak_rss_bytes'] / 1024 / 1024:.1f} MB")
+
+
+def write_report(results: Dict[str, Dict], filename: str, metadata: Optional[Dict] = None) -> Dict:
+    # One JSON document per run, so reports from different runs can be diffed or loaded side by side
+    stages = []
+    for name, result in results.items():
+        entry = {'name': name, 'status': result.get('status'), 'reason': result.get('reason'),
+                 'items': result.get('items')}
+        if 'error' in result:
+            entry['error'] = result['error']
+        entry.update(result.get('profile', {}))
+        stages.append(entry)
+
+    profiled = [stage for stage in stages if 'wall_seconds' in stage]
+    report = {
+        'generated_at': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'host': platform.node(),
+        'platform': platform.platform(),
+        'python': sys.version.split()[0],
+        'cpu_count': os.cpu_count(),
+        'metadata': metadata or {},
+        'stages': stages,
+        'totals': {
+            'wall_seconds': round(sum(stage['wall_seconds'] for stage in profiled), 4),
+            'cpu_seconds': round(sum(stage['cpu_user_seconds'] + stage['cpu_system_seconds'] +
+                                     stage['cpu_children_seconds'] for stage in profiled), 4),
+            'peak_rss_bytes': max((stage['peak_rss_bytes'] for stage in profiled), default=None)
+        }
+    }
+
+    write_json(filename, report)
+    logger.info(f"Profile report saved to {filename}")
+    return report
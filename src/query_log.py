@@ -0,0 +1,51 @@
+import json
+import os
+import time
+import threading
+import logging
+from typing import List, Dict, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# One JSON object per line: {"ts": <unix seconds>, "query": "...", ...extra fields}
+
+
+class QueryLogWriter:
+    def __init__(self, filename: str):
+        self.filename = filename
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(filename, 'a', encoding='utf-8', buffering=1)
+        self._lock = threading.Lock()
+        logger.info(f"Recording queries to {filename}")
+
+    def record(self, query: str, ts: Optional[float] = None, **fields):
+        entry = {'ts': ts if ts is not None else time.time(), 'query': query}
+        entry.update(fields)
+        line = json.dumps(entry, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def read_query_log(filename: str) -> List[Dict]:
+    entries = []
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping invalid query log line {line_number} in {filename}")
+                continue
+            if 'query' in entry and 'ts' in entry:
+                entries.append(entry)
+    entries.sort(key=lambda entry: entry['ts'])
+    return entries
@@ -0,0 +1,66 @@
+import os
+import threading
+import logging
+from typing import Dict, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class IndexFileWatcher:
+    def __init__(self, bot, faqs_file: str = "data/processed_faqs.jsonl",
+                 embeddings_file: str = "data/embeddings.pkl",
+                 index_file: str = "data/faiss_index.bin", interval: float = 10.0):
+        self.bot = bot
+        self.faqs_file = faqs_file
+        self.embeddings_file = embeddings_file
+        self.index_file = index_file
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> "IndexFileWatcher":
+        self._thread = threading.Thread(target=self._run, name="index-file-watcher", daemon=True)
+        self._thread.start()
+        logger.info(f"Watching {self.faqs_file}, {self.embeddings_file} and {self.index_file} every {self.interval}s")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+
+    def _snapshot(self) -> Dict[str, Optional[Tuple[int, int]]]:
+        snapshot = {}
+        for path in (self.faqs_file, self.embeddings_file, self.index_file):
+            try:
+                stat = os.stat(path)
+                snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                snapshot[path] = None
+        return snapshot
+
+    def _needs_rebuild(self, snapshot: Dict[str, Optional[Tuple[int, int]]]) -> bool:
+        faqs, embeddings = snapshot[self.faqs_file], snapshot[self.embeddings_file]
+        return faqs is not None and (embeddings is None or faqs[0] > embeddings[0])
+
+    def _run(self):
+        last = self._snapshot()
+        pending = None
+        while not self._stop.wait(self.interval):
+            current = self._snapshot()
+            if current == last:
+                pending = None
+                continue
+            # Only act once the files have stopped changing for a full interval
+            if current != pending:
+                pending = current
+                continue
+
+            try:
+                self.bot.reload(rebuild=self._needs_rebuild(current))
+            except Exception as e:
+                logger.error(f"Automatic reload failed: {str(e)}")
+            # A rebuild rewrites the index files itself; don't treat that as a new change
+            last = self._snapshot()
+            pending = None
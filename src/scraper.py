@@ -1,24 +1,90 @@
+import os
 import requests
 from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
 import json
 import time
 import logging
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterator, Optional
+
+from .categorizer import SCRAPER_CATEGORIZER
+from .http_scraper import HTTPScraper, CrawlState, parse_static_faqs
+from .corpus_io import write_records, write_json
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Selenium is only needed for pages that render their FAQs with JavaScript
+try:
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from webdriver_manager.chrome import ChromeDriverManager
+except ImportError:
+    webdriver = None
+    logger.info("Selenium unavailable, scraping static HTML only")
+
+FAQ_ELEMENT_SELECTOR = "[class*='faq'], [class*='question'], [class*='accordion']"
+QUESTION_SELECTORS = [
+    "h3", "h4", "h5", ".question", ".faq-question",
+    "[class*='question']", "[class*='title']"
+]
+ANSWER_SELECTORS = [
+    ".answer", ".faq-answer", "[class*='answer']",
+    "[class*='content']", "p"
+]
+CATEGORY_INDICATORS = ["payments", "kyc", "rewards", "cards", "limits"]
+
+# Runs the same selector fallbacks as the per-element WebDriver path inside the page and
+# returns every [question, answer, category] triple in a single round trip
+EXTRACT_FAQS_SCRIPT = """
+const [elementSelector, questionSelectors, answerSelectors, indicators] = arguments;
+const visibleText = (el) => (el && el.innerText) || '';
+const firstText = (el, selectors) => {
+    for (const selector of selectors) {
+        const found = el.querySelector(selector);
+        if (found && visibleText(found).trim()) {
+            return visibleText(found).trim();
+        }
+    }
+    return null;
+};
+return Array.from(document.querySelectorAll(elementSelector)).map((el) => {
+    const text = visibleText(el);
+    const lines = text.split('\\n');
+    let question = firstText(el, questionSelectors);
+    if (question === null) {
+        question = text ? lines[0] : null;
+    }
+    let answer = firstText(el, answerSelectors);
+    if (answer === null && lines.length > 1) {
+        answer = lines.slice(1).join('\\n').trim();
+    }
+    let category = null;
+    const parentText = visibleText(el.parentElement).toLowerCase();
+    for (const indicator of indicators) {
+        if (parentText.includes(indicator)) {
+            category = indicator;
+            break;
+        }
+    }
+    return [question, answer, category];
+});
+"""
+
 class JupiterFAQScraper:
-    def __init__(self, base_url: str = "https://jupiter.money/help"):
+    def __init__(self, base_url: str = "https://jupiter.money/help",
+                 state_file: Optional[str] = os.getenv('FAQ_CRAWL_STATE', "data/crawl_state.json"),
+                 extraction_mode: str = os.getenv('FAQ_EXTRACTION_MODE', "script")):
         self.base_url = base_url
+        # 'script' extracts every FAQ with one execute_script call; 'elements' walks the
+        # elements with one WebDriver call per selector attempt
+        self.extraction_mode = extraction_mode
         self.driver = None
         self.faqs = []
+        self.state_file = state_file
+        self.manifest = []
         
     def setup_driver(self):
         chrome_options = Options()
@@ -38,21 +104,142 @@ class JupiterFAQScraper:
         service = Service(ChromeDriverManager().install())
         self.driver = webdriver.Chrome(service=service, options=chrome_options)
         
-    def scrape_faqs(self) -> List[Dict]:
-        logger.info("Using sample FAQs due to environment limitations")
-        
-        faqs = self._get_comprehensive_sample_faqs()
+    def scrape_faqs(self, urls: Optional[List[str]] = None) -> List[Dict]:
+        for _ in self.iter_faqs(urls):
+            pass
+        return self.faqs
         
+    def iter_faqs(self, urls: Optional[List[str]] = None) -> Iterator[List[Dict]]:
+        # scrape_faqs one page at a time, so later stages can start on the first pages
+        # while the crawl continues; self.faqs holds everything once exhausted
+        urls = urls or [url.strip() for url in os.getenv('FAQ_SCRAPE_URLS', '').split(',') if url.strip()]
+        faqs = []
+        if urls:
+            for page_faqs in self.iter_scraped_faqs(urls):
+                faqs.extend(page_faqs)
+                yield page_faqs
+            if not faqs:
+                logger.warning("No FAQs scraped from the configured URLs")
+                
+        if not faqs:
+            logger.info("Using sample FAQs due to environment limitations")
+            faqs = self._get_comprehensive_sample_faqs()
+            logger.info(f"Successfully loaded {len(faqs)} sample FAQs")
+            yield faqs
+            
         self.faqs = faqs
-        logger.info(f"Successfully loaded {len(faqs)} sample FAQs")
+        
+    def scrape_urls(self, urls: List[str], use_selenium: bool = True, max_workers: int = 8,
+                    max_per_host: int = 2, min_interval: float = 0.5, incremental: bool = True) -> List[Dict]:
+        faqs = []
+        for page_faqs in self.iter_scraped_faqs(urls, use_selenium, max_workers, max_per_host,
+                                                min_interval, incremental):
+            faqs.extend(page_faqs)
         return faqs
-                
+        
+    def iter_scraped_faqs(self, urls: List[str], use_selenium: bool = True, max_workers: int = 8,
+                          max_per_host: int = 2, min_interval: float = 0.5,
+                          incremental: bool = True) -> Iterator[List[Dict]]:
+        # Plain HTTP on pooled connections first; only pages with no FAQs in their static
+        # HTML are rendered in headless Chrome. With a crawl state, conditional requests let
+        # unchanged pages reuse the FAQs stored from the previous crawl. Yields each page's
+        # FAQs as soon as they are available.
+        state = CrawlState(self.state_file) if incremental and self.state_file else None
+        http_scraper = HTTPScraper(max_workers=max_workers, max_per_host=max_per_host,
+                                   min_interval=min_interval)
+        manifest = []
+        needs_js = []
+        total = 0
+        try:
+            for entry, page_faqs in http_scraper.iter_pages(urls, state):
+                manifest.append(entry)
+                if entry.get('needs_js'):
+                    needs_js.append(entry['url'])
+                if page_faqs:
+                    total += len(page_faqs)
+                    yield page_faqs
+        finally:
+            http_scraper.close()
+            
+        if needs_js and use_selenium:
+            if webdriver is None:
+                logger.warning(f"{len(needs_js)} page(s) need JavaScript but Selenium is not installed")
+            else:
+                rendered = self._scrape_with_selenium(needs_js)
+                for entry in manifest:
+                    page_faqs = rendered.get(entry['url'])
+                    if page_faqs is None:
+                        continue
+                    entry['faqs'] = len(page_faqs)
+                    entry['rendered'] = True
+                    if state is not None:
+                        state.update(entry['url'], faqs=page_faqs)
+                    if page_faqs:
+                        total += len(page_faqs)
+                        yield page_faqs
+                        
+        if state is not None:
+            state.save()
+        self.manifest = manifest
+        
+        statuses = {}
+        for entry in manifest:
+            statuses[entry['status']] = statuses.get(entry['status'], 0) + 1
+        logger.info(f"Scraped {total} FAQs from {len(urls)} page(s) {statuses}, {len(needs_js)} needing JavaScript")
+        
+    def _scrape_with_selenium(self, urls: List[str]) -> Dict[str, List[Dict]]:
+        rendered = {}
+        try:
+            self.setup_driver()
+            for url in urls:
+                try:
+                    self.driver.get(url)
+                    WebDriverWait(self.driver, 10).until(
+                        EC.presence_of_element_located((By.TAG_NAME, "body"))
+                    )
+                    page_faqs = self._extract_faqs_from_page() or self._fallback_scraping()
+                    for faq in page_faqs:
+                        faq['source_url'] = url
+                    rendered[url] = page_faqs
+                except Exception as e:
+                    logger.error(f"Selenium scraping failed for {url}: {str(e)}")
+        except Exception as e:
+            logger.error(f"Could not start headless Chrome: {str(e)}")
+        finally:
+            if self.driver is not None:
+                self.driver.quit()
+                self.driver = None
+        return rendered
+        
     def _extract_faqs_from_page(self) -> List[Dict]:
+        if self.extraction_mode == "script":
+            try:
+                return self._extract_faqs_with_script()
+            except Exception as e:
+                logger.warning(f"Script extraction failed ({str(e)}), walking elements instead")
+                
+        return self._extract_faqs_from_elements()
+        
+    def _extract_faqs_with_script(self) -> List[Dict]:
+        triples = self.driver.execute_script(
+            EXTRACT_FAQS_SCRIPT, FAQ_ELEMENT_SELECTOR, QUESTION_SELECTORS, ANSWER_SELECTORS, CATEGORY_INDICATORS
+        )
+        
+        faqs = []
+        for question, answer, category in triples or []:
+            if question and answer and question.strip() and answer.strip():
+                faqs.append({
+                    'question': question.strip(),
+                    'answer': answer.strip(),
+                    'category': category.title() if category else 'General'
+                })
+        return faqs
+        
+    def _extract_faqs_from_elements(self) -> List[Dict]:
         faqs = []
         
         try:
-            faq_elements = self.driver.find_elements(By.CSS_SELECTOR, 
-                "[class*='faq'], [class*='question'], [class*='accordion']")
+            faq_elements = self.driver.find_elements(By.CSS_SELECTOR, FAQ_ELEMENT_SELECTOR)
             
             for element in faq_elements:
                 try:
@@ -76,12 +263,7 @@ class JupiterFAQScraper:
         return faqs
         
     def _extract_question(self, element) -> Optional[str]:
-        question_selectors = [
-            "h3", "h4", "h5", ".question", ".faq-question", 
-            "[class*='question']", "[class*='title']"
-        ]
-        
-        for selector in question_selectors:
+        for selector in QUESTION_SELECTORS:
             try:
                 question_elem = element.find_element(By.CSS_SELECTOR, selector)
                 if question_elem and question_elem.text.strip():
@@ -92,12 +274,7 @@ class JupiterFAQScraper:
         return element.text.split('\n')[0] if element.text else None
         
     def _extract_answer(self, element) -> Optional[str]:
-        answer_selectors = [
-            ".answer", ".faq-answer", "[class*='answer']", 
-            "[class*='content']", "p"
-        ]
-        
-        for selector in answer_selectors:
+        for selector in ANSWER_SELECTORS:
             try:
                 answer_elem = element.find_element(By.CSS_SELECTOR, selector)
                 if answer_elem and answer_elem.text.strip():
@@ -114,10 +291,8 @@ class JupiterFAQScraper:
     def _extract_category(self, element) -> Optional[str]:
         try:
             parent = element.find_element(By.XPATH, "..")
-            category_indicators = ["payments", "kyc", "rewards", "cards", "limits"]
-            
             parent_text = parent.text.lower()
-            for indicator in category_indicators:
+            for indicator in CATEGORY_INDICATORS:
                 if indicator in parent_text:
                     return indicator.title()
                     
@@ -128,48 +303,14 @@ class JupiterFAQScraper:
         
     def _fallback_scraping(self) -> List[Dict]:
         try:
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-            
-            faqs = []
-            
-            headings = soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5'])
-            
-            for heading in headings:
-                if '?' in heading.get_text():
-                    question = heading.get_text().strip()
-                    
-                    answer_elem = heading.find_next_sibling(['p', 'div', 'span'])
-                    answer = answer_elem.get_text().strip() if answer_elem else ""
-                    
-                    if question and answer and len(answer) > 20:
-                        category = self._categorize_question(question)
-                        faqs.append({
-                            'question': question,
-                            'answer': answer,
-                            'category': category
-                        })
-                        
-            return faqs
+            return parse_static_faqs(self.driver.page_source)
             
         except Exception as e:
             logger.error(f"Fallback scraping failed: {str(e)}")
             return []
             
     def _categorize_question(self, question: str) -> str:
-        question_lower = question.lower()
-        
-        if any(word in question_lower for word in ['payment', 'pay', 'money', 'transfer']):
-            return 'Payments'
-        elif any(word in question_lower for word in ['kyc', 'verification', 'document', 'identity']):
-            return 'KYC'
-        elif any(word in question_lower for word in ['reward', 'cashback', 'points', 'benefit']):
-            return 'Rewards'
-        elif any(word in question_lower for word in ['card', 'debit', 'credit']):
-            return 'Cards'
-        elif any(word in question_lower for word in ['limit', 'maximum', 'minimum']):
-            return 'Limits'
-        else:
-            return 'General'
+        return SCRAPER_CATEGORIZER.categorize(question)
             
     def _get_comprehensive_sample_faqs(self) -> List[Dict]:
         return [
@@ -303,17 +444,27 @@ class JupiterFAQScraper:
     def _get_sample_faqs(self) -> List[Dict]:
         return self._get_comprehensive_sample_faqs()[:5]
         
-    def save_faqs(self, filename: str = "data/raw_faqs.json"):
-        import os
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
-        
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(self.faqs, f, indent=2, ensure_ascii=False)
+    def save_faqs(self, filename: str = "data/raw_faqs.jsonl"):
+        write_records(filename, self.faqs)
             
         logger.info(f"FAQs saved to {filename}")
+        
+    def save_manifest(self, filename: str = "data/crawl_manifest.json"):
+        # Per-page new/changed/unchanged/failed status of the last scrape_urls run, so later
+        # stages can tell whether there is anything to reprocess
+        manifest = {
+            'generated_at': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'changed': any(entry['status'] in ('new', 'changed') for entry in self.manifest),
+            'pages': self.manifest
+        }
+        write_json(filename, manifest)
+            
+        logger.info(f"Crawl manifest saved to {filename}")
 
 if __name__ == "__main__":
     scraper = JupiterFAQScraper()
     faqs = scraper.scrape_faqs()
     scraper.save_faqs()
+    if scraper.manifest:
+        scraper.save_manifest()
     print(f"Scraped {len(faqs)} FAQs")
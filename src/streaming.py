@@ -0,0 +1,193 @@
+import os
+import time
+import queue
+import multiprocessing
+import threading
+import logging
+from typing import List, Dict, Iterator, Optional
+
+import numpy as np
+
+from .preprocessor import FAQPreprocessor, clean_faq_chunk, map_chunks
+from .dedup import find_duplicate_groups
+from .embeddings import FAQEmbeddings, faq_text
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class StreamingBuild:
+    # Scrape -> clean/categorize -> encode run concurrently, connected by bounded queues:
+    # a full queue blocks its producer, so a slow stage throttles the ones before it instead
+    # of letting batches pile up in memory. Fetching and encoding release the GIL, so threads
+    # overlap them; cleaning is pure Python and fans out over a process pool of clean_workers
+    # so it doesn't compete with them for the GIL. Dedup and the FAISS index need the whole
+    # corpus and run as barriers once the streams drain.
+    def __init__(self, scraper, preprocessor: Optional[FAQPreprocessor] = None,
+                 embeddings: Optional[FAQEmbeddings] = None, queue_size: int = 8,
+                 chunk_size: int = 256, encode_batch_size: int = 64, threshold: float = 0.8,
+                 clean_workers: Optional[int] = None):
+        self.scraper = scraper
+        self.preprocessor = preprocessor or FAQPreprocessor()
+        self.embeddings = embeddings or FAQEmbeddings()
+        self.queue_size = queue_size
+        self.chunk_size = chunk_size
+        self.encode_batch_size = encode_batch_size
+        self.threshold = threshold
+        self.clean_workers = clean_workers or os.cpu_count() or 1
+
+        self._stop = threading.Event()
+        self._errors: List[tuple] = []
+        self._elapsed: Dict[str, float] = {}
+        self._waiting: Dict[str, float] = {}
+        self._cleaned: List[Dict] = []
+        self._vectors: List[np.ndarray] = []
+
+    def run(self, raw_file: str = "data/raw_faqs.jsonl", processed_file: str = "data/processed_faqs.jsonl",
+            embeddings_file: str = "data/embeddings.pkl", index_file: str = "data/faiss_index.bin") -> Dict:
+        start = time.perf_counter()
+        raw_queue = queue.Queue(maxsize=self.queue_size)
+        clean_queue = queue.Queue(maxsize=self.queue_size)
+        threads = [
+            threading.Thread(target=self._guard, args=("scrape", self._scrape, raw_queue), daemon=True),
+            threading.Thread(target=self._guard, args=("clean", self._clean, raw_queue, clean_queue), daemon=True),
+            threading.Thread(target=self._guard, args=("encode", self._encode, clean_queue), daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if self._errors:
+            name, error = self._errors[0]
+            raise RuntimeError(f"Streaming {name} stage failed: {str(error)}") from error
+        streamed = time.perf_counter() - start
+
+        self.scraper.save_faqs(raw_file)
+        if self.scraper.manifest:
+            self.scraper.save_manifest()
+
+        merged, reencoded = self._finalize(processed_file, embeddings_file, index_file)
+        summary = {
+            'raw': len(self.scraper.faqs),
+            'cleaned': len(self._cleaned),
+            'written': len(merged),
+            'reencoded': reencoded,
+            'streamed_seconds': round(streamed, 3),
+            'finalize_seconds': round(time.perf_counter() - start - streamed, 3),
+            # Time each stage spent working rather than blocked on its queues
+            'busy_seconds': {name: round(self._elapsed[name] - self._waiting.get(name, 0.0), 3)
+                             for name in self._elapsed}
+        }
+        logger.info(f"Streaming build: {summary}")
+        return summary
+
+    def _scrape(self, out: queue.Queue):
+        try:
+            for page_faqs in self.scraper.iter_faqs():
+                for offset in range(0, len(page_faqs), self.chunk_size):
+                    if not self._put("scrape", out, page_faqs[offset:offset + self.chunk_size]):
+                        return
+        finally:
+            self._put("scrape", out, _DONE)
+
+    def _clean(self, source: queue.Queue, out: queue.Queue):
+        try:
+            # In input order, so the output still matches the sequential run. The scrape and
+            # encode threads are running, so pool workers must not be forked from this process
+            methods = multiprocessing.get_all_start_methods()
+            mp_context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            for _, cleaned in map_chunks(clean_faq_chunk, self._drain("clean", source), self.clean_workers,
+                                         mp_context):
+                if not cleaned:
+                    continue
+                self._cleaned.extend(cleaned)
+                if not self._put("clean", out, cleaned):
+                    return
+        finally:
+            self._put("clean", out, _DONE)
+
+    def _encode(self, source: queue.Queue):
+        pending: List[Dict] = []
+        for chunk in self._drain("encode", source):
+            pending.extend(chunk)
+            while len(pending) >= self.encode_batch_size:
+                self._vectors.append(self._encode_faqs(pending[:self.encode_batch_size]))
+                pending = pending[self.encode_batch_size:]
+        if pending and not self._stop.is_set():
+            self._vectors.append(self._encode_faqs(pending))
+
+    def _encode_faqs(self, faqs: List[Dict]) -> np.ndarray:
+        return np.asarray(self.embeddings.model.encode([faq_text(faq) for faq in faqs], show_progress_bar=False))
+
+    def _finalize(self, processed_file: str, embeddings_file: str, index_file: str) -> tuple:
+        cleaned = self._cleaned
+        if not cleaned:
+            raise ValueError("No FAQs left after cleaning")
+        vectors = np.vstack(self._vectors)
+
+        # Barrier 1: dedup needs every question
+        self.preprocessor.categories.update(faq['category'] for faq in cleaned)
+        similar_groups = find_duplicate_groups([faq['question'] for faq in cleaned], threshold=self.threshold)
+        primary_answers = [cleaned[group[0]]['answer'] for group in similar_groups]
+        grouped = {i for group in similar_groups for i in group}
+        # merge_similar_faqs emits the groups (by primary) first, then the ungrouped FAQs in order
+        sources = [group[0] for group in similar_groups] + [i for i in range(len(cleaned)) if i not in grouped]
+        merged = self.preprocessor.merge_similar_faqs(cleaned, similar_groups)
+        self.preprocessor.processed_faqs = merged
+        self.preprocessor.save_processed_faqs(processed_file)
+
+        # A merged FAQ keeps its primary's vector unless the merge swapped in a longer answer
+        merged_vectors = vectors[sources]
+        swapped = [i for i, answer in enumerate(primary_answers) if merged[i]['answer'] != answer]
+        if swapped:
+            merged_vectors[swapped] = self._encode_faqs([merged[i] for i in swapped])
+
+        # Barrier 2: the index is built once over the final corpus
+        self.embeddings.faqs = merged
+        self.embeddings.embeddings = merged_vectors
+        self.embeddings.dimension = merged_vectors.shape[1]
+        self.embeddings.build_faiss_index()
+        self.embeddings.save_embeddings(embeddings_file, index_file)
+        return merged, len(swapped)
+
+    def _guard(self, name: str, target, *args):
+        start = time.perf_counter()
+        try:
+            target(*args)
+        except Exception as e:
+            logger.error(f"Streaming {name} stage failed: {str(e)}")
+            self._errors.append((name, e))
+            # Unblocks every other stage so the build fails fast instead of hanging
+            self._stop.set()
+        finally:
+            self._elapsed[name] = time.perf_counter() - start
+
+    def _put(self, name: str, out: queue.Queue, item) -> bool:
+        start = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                try:
+                    out.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        finally:
+            self._waiting[name] = self._waiting.get(name, 0.0) + time.perf_counter() - start
+
+    def _drain(self, name: str, source: queue.Queue) -> Iterator:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = source.get(timeout=0.1)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return
+                continue
+            finally:
+                self._waiting[name] = self._waiting.get(name, 0.0) + time.perf_counter() - start
+            if item is _DONE:
+                return
+            yield item
@@ -0,0 +1,199 @@
+import os
+import sys
+import time
+import uuid
+import threading
+import logging
+from collections import deque, Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import List, Dict, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_current_span: ContextVar[Optional['Span']] = ContextVar('faq_current_span', default=None)
+
+
+class Span:
+    __slots__ = ('name', 'start', 'end', 'error', 'children')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.error: Optional[str] = None
+        self.children: List['Span'] = []
+
+    def to_dict(self, origin: float) -> Dict:
+        end = self.end if self.end is not None else time.perf_counter()
+        result = {
+            'name': self.name,
+            'start_ms': round((self.start - origin) * 1000, 3),
+            'duration_ms': round((end - self.start) * 1000, 3),
+        }
+        if self.error is not None:
+            result['error'] = self.error
+        if self.children:
+            result['children'] = [child.to_dict(origin) for child in self.children]
+        return result
+
+
+class Trace:
+    def __init__(self, name: str, attributes: Optional[Dict] = None):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.started_at = datetime.now().isoformat()
+        self.root = Span(name)
+        self.attributes = attributes or {}
+        # Collapsed stacks ("module:function;...") from the sampling profiler, if enabled
+        self.samples: Counter = Counter()
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.root.end if self.root.end is not None else time.perf_counter()
+        return (end - self.root.start) * 1000
+
+    def to_dict(self, max_stacks: int = 20) -> Dict:
+        root = self.root.to_dict(self.root.start)
+        result = {
+            'trace_id': self.trace_id,
+            'name': self.root.name,
+            'started_at': self.started_at,
+            'duration_ms': root['duration_ms'],
+            'attributes': self.attributes,
+            'spans': root.get('children', [])
+        }
+        if self.root.error is not None:
+            result['error'] = self.root.error
+        if self.samples:
+            result['samples'] = [{'stack': stack, 'count': count}
+                                 for stack, count in self.samples.most_common(max_stacks)]
+        return result
+
+
+@contextmanager
+def span(name: str):
+    # A child of whatever span is current in this context; free when no trace is active
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(name)
+    parent.children.append(child)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except Exception as e:
+        child.error = type(e).__name__
+        raise
+    finally:
+        child.end = time.perf_counter()
+        _current_span.reset(token)
+
+
+class Tracer:
+    # Traces whole requests as span trees and keeps the ones slower than slow_ms in a ring
+    # buffer. With sample_interval_ms, a background thread also samples the stack of every
+    # thread inside a trace, so a slow request shows where it spent the time between spans.
+    def __init__(self, slow_ms: float = 1000.0, buffer_size: int = 100, sample_interval_ms: float = 0.0,
+                 query_chars: int = 0):
+        self.slow_ms = slow_ms
+        self.sample_interval_ms = sample_interval_ms
+        self.query_chars = query_chars
+        self._slow: deque = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+        self._active: Dict[int, Trace] = {}
+        self._sampler: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls) -> 'Tracer':
+        return cls(
+            slow_ms=float(os.getenv('FAQ_SLOW_TRACE_MS', '1000')),
+            buffer_size=int(os.getenv('FAQ_SLOW_TRACE_BUFFER', '100')),
+            sample_interval_ms=float(os.getenv('FAQ_TRACE_SAMPLE_MS', '0')),
+            query_chars=int(os.getenv('FAQ_TRACE_QUERY_CHARS', '0'))
+        )
+
+    def redact(self, text: str) -> str:
+        # User text is kept in traces only up to query_chars characters; by default, not at all
+        if len(text) <= self.query_chars:
+            return text
+        if self.query_chars > 0:
+            return text[:self.query_chars] + "..."
+        return f"<redacted, {len(text)} chars>"
+
+    @contextmanager
+    def trace(self, name: str, **attributes):
+        # Inside another trace this is just a nested span
+        if _current_span.get() is not None:
+            with span(name):
+                yield None
+            return
+
+        trace = Trace(name, attributes)
+        token = _current_span.set(trace.root)
+        thread_id = threading.get_ident()
+        if self.sample_interval_ms > 0:
+            self._ensure_sampler()
+            with self._lock:
+                self._active[thread_id] = trace
+        try:
+            yield trace
+        except Exception as e:
+            trace.root.error = type(e).__name__
+            raise
+        finally:
+            trace.root.end = time.perf_counter()
+            _current_span.reset(token)
+            if self.sample_interval_ms > 0:
+                with self._lock:
+                    self._active.pop(thread_id, None)
+            if trace.duration_ms >= self.slow_ms:
+                with self._lock:
+                    self._slow.append(trace)
+                logger.warning(f"Slow request {trace.trace_id}: {name} took {trace.duration_ms:.0f}ms")
+
+    def slow_traces(self, limit: Optional[int] = None) -> List[Dict]:
+        # Newest first
+        with self._lock:
+            return [trace.to_dict() for trace in list(self._slow)[::-1][:limit]]
+
+    def clear(self):
+        with self._lock:
+            self._slow.clear()
+
+    def _ensure_sampler(self):
+        if self._sampler is not None:
+            return
+        with self._lock:
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._sample_loop, name="trace-sampler", daemon=True)
+                self._sampler.start()
+
+    def _sample_loop(self):
+        interval = self.sample_interval_ms / 1000
+        while True:
+            time.sleep(interval)
+            with self._lock:
+                active = list(self._active.items())
+            if not active:
+                continue
+            frames = sys._current_frames()
+            stacks = []
+            for thread_id, trace in active:
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}")
+                    frame = frame.f_back
+                stacks.append((trace, ";".join(reversed(stack))))
+            del frames
+            with self._lock:
+                for trace, stack in stacks:
+                    trace.samples[stack] += 1
+
+
+TRACER = Tracer.from_env()
@@ -1,10 +1,15 @@
 import json
 import logging
 import os
-from typing import Dict, List, Any
+import functools
+from typing import Dict, List, Any, Optional, Tuple
 import time
 from datetime import datetime
 
+import numpy as np
+
+from .corpus_io import read_json, write_json
+
 def setup_logging(log_level: str = "INFO", log_file: str = None):
     log_format = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     
@@ -25,19 +30,16 @@ def setup_logging(log_level: str = "INFO", log_file: str = None):
 
 def load_json(filename: str) -> Dict:
     try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return read_json(filename)
     except FileNotFoundError:
         logging.error(f"File {filename} not found")
         return {}
-    except json.JSONDecodeError:
+    except ValueError:
         logging.error(f"Invalid JSON in {filename}")
         return {}
 
 def save_json(data: Any, filename: str):
-    os.makedirs(os.path.dirname(filename), exist_ok=True)
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    write_json(filename, data)
 
 def create_directories(paths: List[str]):
     for path in paths:
@@ -48,11 +50,13 @@ def get_timestamp() -> str:
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
 def measure_time(func):
+    @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        start_time = time.time()
+        start_time = time.perf_counter()
+        start_cpu = time.process_time()
         result = func(*args, **kwargs)
-        end_time = time.time()
-        logging.info(f"{func.__name__} took {end_time - start_time:.2f} seconds")
+        logging.info(f"{func.__name__} took {time.perf_counter() - start_time:.2f} seconds "
+                     f"({time.process_time() - start_cpu:.2f}s CPU)")
         return result
     return wrapper
 
@@ -73,13 +77,108 @@ def format_faq_for_display(faq: Dict) -> str:
     """
 
 def calculate_similarity_score(text1: str, text2: str) -> float:
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    from sklearn.metrics.pairwise import cosine_similarity
-    
-    vectorizer = TfidfVectorizer()
-    tfidf_matrix = vectorizer.fit_transform([text1, text2])
-    similarity = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])
-    return float(similarity[0][0])
+    # One-off score with IDF fitted on just the two texts; use TextSimilarity for anything in bulk
+    return float(TextSimilarity([text1, text2]).pair_scores([text1], [text2])[0])
+
+def _top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        empty = np.zeros((scores.shape[0], 0))
+        return empty.astype(np.int64), empty
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind='stable')
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+def _top_matches(score_block, queries: List[str], k: int, block_size: int) -> Tuple[np.ndarray, np.ndarray]:
+    indices, scores = [], []
+    for start in range(0, len(queries), block_size):
+        block_indices, block_scores = _top_k(score_block(queries[start:start + block_size]), k)
+        indices.append(block_indices)
+        scores.append(block_scores)
+    if not indices:
+        return np.zeros((0, 0), dtype=np.int64), np.zeros((0, 0))
+    return np.vstack(indices), np.vstack(scores)
+
+class TextSimilarity:
+    # TF-IDF cosine scoring that fits once and then scores whole batches with sparse products.
+    # Pass a fitted vectorizer (and the matrix it produced) to reuse an existing model, e.g.
+    # FAQEmbeddings.lexical_vectorizer/lexical_matrix or an IncrementalDeduplicator's.
+    def __init__(self, corpus: Optional[List[str]] = None, vectorizer=None, matrix=None):
+        if vectorizer is None:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            vectorizer = TfidfVectorizer()
+            if corpus is not None:
+                matrix = vectorizer.fit_transform(corpus)
+        elif corpus is not None and matrix is None:
+            matrix = vectorizer.transform(corpus)
+        self.vectorizer = vectorizer
+        self.matrix = matrix
+        
+    def transform(self, texts: List[str]):
+        # Rows are L2-normalized (TfidfVectorizer's default), so dot products are cosines
+        return self.vectorizer.transform(texts)
+        
+    def pair_scores(self, texts_a: List[str], texts_b: List[str]) -> np.ndarray:
+        # Cosine of texts_a[i] with texts_b[i] for every i
+        if len(texts_a) != len(texts_b):
+            raise ValueError("pair_scores needs two lists of the same length")
+        if not texts_a:
+            return np.zeros(0)
+        return np.asarray(self.transform(texts_a).multiply(self.transform(texts_b)).sum(axis=1)).ravel()
+        
+    def query_scores(self, queries: List[str], corpus: Optional[List[str]] = None) -> np.ndarray:
+        # Dense len(queries) x len(corpus) cosine matrix; corpus defaults to the fitted one
+        corpus_matrix = self.transform(corpus) if corpus is not None else self.matrix
+        if corpus_matrix is None:
+            raise ValueError("No corpus: pass one here or when constructing TextSimilarity")
+        return (self.transform(queries) @ corpus_matrix.T).toarray()
+        
+    def top_matches(self, queries: List[str], k: int = 5,
+                    block_size: int = 1024) -> Tuple[np.ndarray, np.ndarray]:
+        # (indices, scores) of the k best corpus rows per query, best first; scoring a block of
+        # queries at a time keeps memory at block_size x len(corpus)
+        return _top_matches(self.query_scores, queries, k, block_size)
+
+class EmbeddingSimilarity:
+    # The same API over sentence embeddings: FAQ vectors come straight out of the FAISS index
+    # (already normalized). Texts are encoded with the model directly: bulk offline scoring
+    # must not churn the serving query cache or skew its metrics
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+        index = embeddings.index
+        if index is None:
+            raise ValueError("FAQEmbeddings has no FAISS index; build or load one first")
+        self.vectors = index.reconstruct_n(0, index.ntotal)
+        
+    def pair_scores(self, texts_a: List[str], texts_b: List[str]) -> np.ndarray:
+        if len(texts_a) != len(texts_b):
+            raise ValueError("pair_scores needs two lists of the same length")
+        if not texts_a:
+            return np.zeros(0)
+        vectors = self._encode(list(texts_a) + list(texts_b))
+        return np.einsum('ij,ij->i', vectors[:len(texts_a)], vectors[len(texts_a):])
+        
+    def faq_pair_scores(self, pairs: List[Tuple[int, int]]) -> np.ndarray:
+        # Scores between indexed FAQs without encoding anything
+        if not pairs:
+            return np.zeros(0)
+        pairs = np.asarray(pairs)
+        return np.einsum('ij,ij->i', self.vectors[pairs[:, 0]], self.vectors[pairs[:, 1]])
+        
+    def query_scores(self, queries: List[str]) -> np.ndarray:
+        return self._encode(queries) @ self.vectors.T
+        
+    def top_matches(self, queries: List[str], k: int = 5,
+                    block_size: int = 1024) -> Tuple[np.ndarray, np.ndarray]:
+        return _top_matches(self.query_scores, queries, k, block_size)
+        
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        # Normalized like serving queries so scores match search results
+        from .embeddings import normalize_query
+        encoded = np.asarray(self.embeddings.model.encode([normalize_query(text) for text in texts],
+                                                          show_progress_bar=False))
+        return (encoded / np.linalg.norm(encoded, axis=1, keepdims=True)).astype('float32')
 
 def clean_filename(filename: str) -> str:
     import re
@@ -87,15 +186,32 @@ def clean_filename(filename: str) -> str:
 
 def get_file_size(filename: str) -> str:
     try:
-        size = os.path.getsize(filename)
-        for unit in ['B', 'KB', 'MB', 'GB']:
-            if size < 1024.0:
-                return f"{size:.1f} {unit}"
-            size /= 1024.0
-        return f"{size:.1f} TB"
+        return format_bytes(os.path.getsize(filename))
     except OSError:
         return "Unknown"
 
+def get_memory_usage(pid: str = "self") -> Dict[str, int]:
+    # smaps_rollup separates pages shared copy-on-write with the parent from private ones;
+    # PSS divides shared pages between the processes mapping them
+    usage = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", 'r') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == 'kB':
+                    usage[parts[0].rstrip(':').lower()] = int(parts[1]) * 1024
+    except OSError:
+        import resource
+        usage['rss'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return usage
+
+def format_bytes(size: float) -> str:
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if size < 1024.0:
+            return f"{size:.1f} {unit}"
+        size /= 1024.0
+    return f"{size:.1f} TB"
+
 class PerformanceMonitor:
     def __init__(self):
         self.metrics = {}
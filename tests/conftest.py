@@ -0,0 +1,129 @@
+import re
+import time
+import zlib
+import hashlib
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import numpy as np
+import pytest
+
+
+class HashEncoder:
+    # Deterministic bag-of-words encoder with the SentenceTransformer.encode signature, so
+    # index and similarity tests run without downloading a model
+    def __init__(self, dimension: int = 64):
+        self.dimension = dimension
+        self.calls = 0
+
+    def encode(self, texts, show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        self.calls += 1
+        vectors = np.zeros((len(texts), self.dimension), dtype='float32')
+        for i, text in enumerate(texts):
+            for word in re.findall(r'\w+', text.lower()):
+                vectors[i, zlib.crc32(word.encode('utf-8')) % self.dimension] += 1.0
+            vectors[i, 0] += 1e-3
+        return vectors
+
+
+SAMPLE_FAQS = [
+    {'question': "How do I activate my debit card?", 'answer': "Open the Card tab and tap Activate.",
+     'category': "Cards"},
+    {'question': "What documents are needed for KYC?", 'answer': "A PAN card and an Aadhaar card.",
+     'category': "KYC"},
+    {'question': "How do Jupiter rewards work?", 'answer': "You earn Jewels on every UPI and card payment.",
+     'category': "Rewards"},
+]
+
+
+@pytest.fixture
+def faq_embeddings():
+    from src.embeddings import FAQEmbeddings
+
+    embeddings = FAQEmbeddings(model=HashEncoder())
+    embeddings.faqs = [dict(faq) for faq in SAMPLE_FAQS]
+    embeddings.create_embeddings()
+    embeddings.build_faiss_index()
+    return embeddings
+
+
+class FixtureSite:
+    # Static pages served over real HTTP on 127.0.0.1, with ETags, conditional 304s, injectable
+    # failures and a record of what the scraper sent
+    def __init__(self, delay: float = 0.0):
+        self.pages = {}
+        self.failures = {}
+        self.delay = delay
+        self.requests = []
+        self.client_ports = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_port}{path}"
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _make_handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                with site._lock:
+                    site.requests.append((self.path, dict(self.headers)))
+                    site.client_ports.add(self.client_address[1])
+                    site.in_flight += 1
+                    site.max_in_flight = max(site.max_in_flight, site.in_flight)
+                try:
+                    time.sleep(site.delay)
+                    self._respond()
+                finally:
+                    with site._lock:
+                        site.in_flight -= 1
+
+            def _respond(self):
+                if self.path in site.failures:
+                    self._send(site.failures[self.path], b"failure")
+                    return
+                html = site.pages.get(self.path)
+                if html is None:
+                    self._send(404, b"not found")
+                    return
+                body = html.encode('utf-8')
+                etag = '"%s"' % hashlib.sha1(body).hexdigest()[:12]
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                self._send(200, body, etag)
+
+            def _send(self, status: int, body: bytes, etag: str = None):
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                if etag:
+                    self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+@pytest.fixture
+def site():
+    site = FixtureSite()
+    yield site
+    site.stop()
@@ -0,0 +1,30 @@
+import asyncio
+
+from src.admission import RateLimiter, AdmissionController
+
+
+def test_rate_limiter_rejects_when_bucket_is_empty():
+    limiter = RateLimiter(rate=1.0, burst=2.0)
+    assert limiter.check("a") is None
+    assert limiter.check("a") is None
+    assert limiter.check("a") > 0
+    # Buckets are per client
+    assert limiter.check("b") is None
+
+
+def test_cost_above_burst_drains_a_full_bucket():
+    limiter = RateLimiter(rate=10.0, burst=20.0)
+    assert limiter.check("a", cost=25) is None
+    retry_after = limiter.check("a", cost=25)
+    assert 0 < retry_after <= 2.0
+
+
+def test_batch_larger_than_burst_is_admitted():
+    controller = AdmissionController(rate_limiter=RateLimiter(rate=10.0, burst=20.0))
+
+    async def admit():
+        level = await controller.acquire("client", cost=25)
+        controller.release()
+        return level
+
+    assert asyncio.run(admit()) == 0
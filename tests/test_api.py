@@ -0,0 +1,51 @@
+import pytest
+from fastapi import Request
+from fastapi.testclient import TestClient
+
+import app.main as main
+
+
+@pytest.fixture
+def client():
+    # No lifespan: the admin check runs before any handler touches the bot
+    return TestClient(main.app)
+
+
+def test_admin_reload_is_disabled_without_a_token(client, monkeypatch):
+    monkeypatch.setattr(main, "ADMIN_TOKEN", None)
+    assert client.post("/admin/reload?rebuild=true").status_code == 403
+    assert client.post("/admin/reload", headers={"X-Admin-Token": ""}).status_code == 403
+
+
+def test_admin_reload_requires_the_configured_token(client, monkeypatch):
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    assert client.post("/admin/reload").status_code == 403
+    assert client.post("/admin/reload", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    # Past the check; the bot was never loaded in this test
+    assert client.post("/admin/reload", headers={"X-Admin-Token": "secret"}).status_code == 503
+
+
+def test_slow_traces_require_the_admin_token(client, monkeypatch):
+    monkeypatch.setattr(main, "ADMIN_TOKEN", None)
+    assert client.get("/admin/traces/slow").status_code == 403
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    assert client.get("/admin/traces/slow").status_code == 403
+    response = client.get("/admin/traces/slow", headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    assert "traces" in response.json()
+
+
+def request_from(host: str, headers: dict):
+    return Request({'type': 'http', 'headers': [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+                    'client': (host, 1234)})
+
+
+def test_client_id_ignores_the_header_from_untrusted_peers(monkeypatch):
+    monkeypatch.setattr(main, "TRUSTED_PROXIES", set())
+    assert main.client_id(request_from("10.0.0.5", {"X-Client-ID": "fresh-id"})) == "10.0.0.5"
+
+
+def test_client_id_trusts_the_header_from_a_configured_proxy(monkeypatch):
+    monkeypatch.setattr(main, "TRUSTED_PROXIES", {"10.0.0.1"})
+    assert main.client_id(request_from("10.0.0.1", {"X-Client-ID": "tenant-7"})) == "tenant-7"
+    assert main.client_id(request_from("10.0.0.1", {})) == "10.0.0.1"
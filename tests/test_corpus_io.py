@@ -0,0 +1,20 @@
+import json
+
+from src.corpus_io import read_records, write_records, read_record_chunks
+
+RECORDS = [{'question': f"Question {i}?", 'answer': f"Answer {i}"} for i in range(5)]
+
+
+def test_round_trip_all_formats(tmp_path):
+    for name in ("faqs.json", "faqs.jsonl", "faqs.json.gz", "faqs.jsonl.gz"):
+        path = str(tmp_path / name)
+        assert write_records(path, RECORDS) == len(RECORDS)
+        assert read_records(path) == RECORDS
+
+
+def test_chunks_stream_a_legacy_json_list(tmp_path):
+    # Only the pre-JSONL file exists; the .jsonl default must still resolve to it
+    (tmp_path / "raw_faqs.json").write_text(json.dumps(RECORDS), encoding='utf-8')
+    chunks = list(read_record_chunks(str(tmp_path / "raw_faqs.jsonl"), chunk_size=2))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert [record for chunk in chunks for record in chunk] == RECORDS
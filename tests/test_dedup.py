@@ -0,0 +1,76 @@
+import random
+
+from sklearn.metrics.pairwise import cosine_similarity
+
+from src.dedup import find_duplicate_groups, _new_vectorizer
+
+WORDS = "pay upi card limit kyc reward cashback account balance transfer money debit atm pin otp fraud".split()
+
+# a~b and b~c at threshold 0.7, but a and c only 0.6 apart
+CHAIN = ["how do i pay my credit card bill", "how do i pay my credit card bill online",
+         "pay credit card bill online today"]
+
+
+def dense_components(texts, threshold):
+    # Reference: connected components of the dense thresholded cosine graph
+    similarity = cosine_similarity(_new_vectorizer().fit_transform(texts))
+    parent = list(range(len(texts)))
+
+    def find(i):
+        while parent[i] != i:
+            i = parent[i]
+        return i
+
+    for i in range(len(texts)):
+        for j in range(i + 1, len(texts)):
+            if similarity[i, j] >= threshold:
+                parent[find(j)] = find(i)
+    members = {}
+    for i in range(len(texts)):
+        members.setdefault(find(i), []).append(i)
+    return sorted((group for group in members.values() if len(group) > 1), key=lambda g: g[0])
+
+
+def greedy_groups(texts, threshold):
+    # The previous dense pass: each unassigned text claims every later unassigned match
+    similarity = cosine_similarity(_new_vectorizer().fit_transform(texts))
+    groups, assigned = [], set()
+    for i in range(len(texts)):
+        if i in assigned:
+            continue
+        group = [i] + [j for j in range(i + 1, len(texts)) if j not in assigned and similarity[i, j] >= threshold]
+        if len(group) > 1:
+            groups.append(group)
+            assigned.update(group)
+    return groups
+
+
+def random_corpus(rng):
+    base = [" ".join(rng.choices(WORDS, k=5)) for _ in range(30)]
+    near = [text + " " + rng.choice(WORDS) for text in rng.sample(base, 10)]
+    repeats = [rng.choice(base) for _ in range(5)]
+    return base + near + repeats
+
+
+def test_matches_dense_components_on_random_corpora():
+    rng = random.Random(1)
+    for _ in range(100):
+        texts = random_corpus(rng)
+        for threshold in (0.6, 0.8):
+            # A small block size exercises the blocked product
+            assert find_duplicate_groups(texts, threshold, top_k=None, block_size=7) == \
+                dense_components(texts, threshold)
+
+
+def test_chains_merge_into_one_group():
+    similarity = cosine_similarity(_new_vectorizer().fit_transform(CHAIN))
+    assert similarity[0, 1] >= 0.7 and similarity[1, 2] >= 0.7 and similarity[0, 2] < 0.7
+    assert find_duplicate_groups(CHAIN, threshold=0.7) == [[0, 1, 2]]
+    # The documented difference: the greedy pass left c out because it only compared with a
+    assert greedy_groups(CHAIN, threshold=0.7) == [[0, 1]]
+
+
+def test_exact_repeats_and_stop_words():
+    assert find_duplicate_groups(["how do I pay", "how do I pay", "reset my pin"]) == [[0, 1]]
+    assert find_duplicate_groups(["the", "the", "a"]) == []
+
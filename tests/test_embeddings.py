@@ -0,0 +1,23 @@
+import pytest
+
+from src.embeddings import check_backend, exact_match_key, normalize_query
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError, match="Unknown encoder backend"):
+        check_backend("tensorflow")
+
+
+def test_torch_backend_is_always_supported():
+    check_backend("torch")
+
+
+def test_index_search_finds_the_matching_faq(faq_embeddings):
+    results = faq_embeddings.search_similar("how do I activate my debit card", k=1, threshold=0.1)
+    assert results[0][0]['category'] == "Cards"
+    assert faq_embeddings.search_exact("How do I activate my debit card")[0][0]['category'] == "Cards"
+
+
+def test_query_normalization():
+    assert normalize_query("  How   DO I pay?  ") == "how do i pay?"
+    assert exact_match_key("How do I pay?") == "how do i pay"
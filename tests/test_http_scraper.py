@@ -0,0 +1,126 @@
+import time
+
+from src.http_scraper import HTTPScraper, CrawlState
+
+FAQ_HTML = ("<html><body><h2>How do I activate my debit card?</h2>"
+            "<p>Open the Jupiter app, go to the Card tab and follow the activation steps.</p></body></html>")
+NO_FAQ_HTML = "<html><body><div id='root'></div></body></html>"
+
+
+def faq_page(i: int) -> str:
+    return (f"<html><body><h3>How do I pay bill number {i}?</h3>"
+            f"<p>Open the Payments tab and choose bill {i} from your saved billers.</p></body></html>")
+
+
+def crawl(site, paths, state=None, **kwargs):
+    scraper = HTTPScraper(min_interval=0, **kwargs)
+    try:
+        return scraper.scrape([site.url(path) for path in paths], state)
+    finally:
+        scraper.close()
+
+
+def test_static_pages_are_parsed_in_input_order(site):
+    paths = [f"/p{i}" for i in range(6)]
+    for i, path in enumerate(paths):
+        site.pages[path] = faq_page(i)
+    faqs, needs_js, manifest = crawl(site, paths)
+    assert [faq['question'] for faq in faqs] == [f"How do I pay bill number {i}?" for i in range(6)]
+    assert [entry['status'] for entry in manifest] == ['new'] * 6
+    assert faqs[0]['source_url'] == site.url("/p0")
+    assert needs_js == []
+
+
+def test_connections_are_pooled_and_hosts_limited(site):
+    site.delay = 0.05
+    paths = [f"/p{i}" for i in range(12)]
+    for i, path in enumerate(paths):
+        site.pages[path] = faq_page(i)
+    crawl(site, paths, max_workers=6, max_per_host=2)
+    assert site.max_in_flight <= 2
+    # Keep-alive connections are reused rather than opened per request
+    assert len(site.client_ports) < len(paths)
+
+
+def test_pages_without_static_faqs_need_javascript(site):
+    site.pages["/app"] = NO_FAQ_HTML
+    faqs, needs_js, manifest = crawl(site, ["/app"])
+    assert faqs == [] and needs_js == [site.url("/app")]
+
+
+def test_unchanged_page_reuses_stored_faqs(site, tmp_path):
+    state = CrawlState(str(tmp_path / "state.json"))
+    site.pages["/faq"] = FAQ_HTML
+
+    faqs, needs_js, manifest = crawl(site, ["/faq"], state)
+    assert len(faqs) == 1 and manifest[0]['status'] == 'new'
+
+    faqs, needs_js, manifest = crawl(site, ["/faq"], state)
+    assert len(faqs) == 1 and manifest[0]['status'] == 'unchanged'
+
+
+def test_changed_page_without_faqs_drops_stale_faqs(site, tmp_path):
+    state = CrawlState(str(tmp_path / "state.json"))
+    site.pages["/faq"] = FAQ_HTML
+    crawl(site, ["/faq"], state)
+
+    site.pages["/faq"] = NO_FAQ_HTML
+    faqs, needs_js, manifest = crawl(site, ["/faq"], state)
+    assert faqs == [] and needs_js == [site.url("/faq")]
+    assert manifest[0]['status'] == 'changed'
+    assert state.get(site.url("/faq"))['faqs'] == []
+
+    # Same content again: nothing stored to reuse, so the old FAQs must not come back
+    faqs, needs_js, manifest = crawl(site, ["/faq"], state)
+    assert faqs == [] and needs_js == [site.url("/faq")]
+
+
+def test_iter_pages_stops_fetching_when_the_consumer_stops(site):
+    paths = [f"/p{i}" for i in range(20)]
+    for i, path in enumerate(paths):
+        site.pages[path] = faq_page(i)
+    scraper = HTTPScraper(max_workers=2, min_interval=0)
+    pages = scraper.iter_pages([site.url(path) for path in paths])
+    entry, faqs = next(pages)
+    assert entry['url'] == site.url("/p0")
+    time.sleep(0.2)
+    # Only the bounded window was fetched, not the whole crawl
+    assert len(site.requests) <= 4
+    pages.close()
+    scraper.close()
+
+
+def test_not_modified_page_reuses_stored_faqs(site, tmp_path):
+    state = CrawlState(str(tmp_path / "state.json"))
+    site.pages["/faq"] = FAQ_HTML
+    first, _, _ = crawl(site, ["/faq"], state)
+    etag = state.get(site.url("/faq"))['etag']
+    assert etag
+
+    faqs, needs_js, manifest = crawl(site, ["/faq"], state)
+    path, headers = site.requests[-1]
+    assert headers.get('If-None-Match') == etag
+    assert manifest[0]['status'] == 'unchanged'
+    assert faqs == first
+
+
+def test_failed_fetch_keeps_the_last_known_faqs(site, tmp_path):
+    state = CrawlState(str(tmp_path / "state.json"))
+    site.pages["/faq"] = FAQ_HTML
+    first, _, _ = crawl(site, ["/faq"], state)
+
+    site.failures["/faq"] = 503
+    faqs, needs_js, manifest = crawl(site, ["/faq"], state)
+    assert manifest[0]['status'] == 'failed'
+    assert faqs == first and needs_js == []
+
+    # Recovers as unchanged once the page answers again
+    del site.failures["/faq"]
+    faqs, _, manifest = crawl(site, ["/faq"], state)
+    assert manifest[0]['status'] == 'unchanged' and faqs == first
+
+
+def test_failed_fetch_of_a_new_page_yields_nothing(site):
+    site.failures["/faq"] = 500
+    faqs, needs_js, manifest = crawl(site, ["/faq"])
+    assert faqs == [] and manifest[0]['status'] == 'failed'
@@ -0,0 +1,140 @@
+import time
+
+import pytest
+
+from loadtest.fake_llm import FakeLLMServer, LatencyModel
+from src.llm_client import LLMClient, LLMError, CircuitBreaker, CircuitOpenError
+
+MESSAGES = [{"role": "user", "content": "How do I activate my debit card?"}]
+
+
+def fast_server(**kwargs) -> FakeLLMServer:
+    return FakeLLMServer(latency=LatencyModel("fixed", mean_ms=0), token_interval_ms=1, **kwargs).start()
+
+
+@pytest.fixture
+def server():
+    server = fast_server()
+    yield server
+    server.stop()
+
+
+def open_breaker(reset_timeout: float = 0.1) -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=reset_timeout)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    return breaker
+
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+
+def test_half_open_lets_a_single_probe_through():
+    breaker = open_breaker()
+    time.sleep(0.15)
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow_request()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request()
+
+
+def test_failed_probe_reopens():
+    breaker = open_breaker()
+    time.sleep(0.15)
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+
+def test_half_open_probe_against_server(server):
+    client = LLMClient("test", base_url=server.base_url, max_retries=0, breaker=open_breaker())
+    with pytest.raises(CircuitOpenError):
+        client.chat(MESSAGES)
+    time.sleep(0.15)
+    assert client.chat(MESSAGES)
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_slot_timeout_releases_half_open_probe(server):
+    client = LLMClient("test", base_url=server.base_url, max_retries=0, timeout=0.1,
+                       max_concurrency=1, breaker=open_breaker())
+    time.sleep(0.15)
+    client._slots.acquire()
+    try:
+        with pytest.raises(LLMError, match="slot"):
+            client.chat(MESSAGES)
+    finally:
+        client._slots.release()
+
+    # The probe claimed by the timed-out request must not block the next one
+    assert client.breaker.state == CircuitBreaker.HALF_OPEN
+    assert client.chat(MESSAGES)
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_retryable_errors_open_the_breaker():
+    server = fast_server(error_rate=1.0)
+    try:
+        client = LLMClient("test", base_url=server.base_url, max_retries=0,
+                           breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+        for _ in range(2):
+            with pytest.raises(LLMError):
+                client.chat(MESSAGES)
+        assert not client.available()
+        with pytest.raises(CircuitOpenError):
+            client.chat(MESSAGES)
+    finally:
+        server.stop()
+
+
+def test_stream_completes_and_records_success(server):
+    client = LLMClient("test", base_url=server.base_url, max_retries=0)
+    assert "Jupiter FAQ" in "".join(client.stream_chat(MESSAGES))
+    assert client._slots.acquire(blocking=False)
+
+
+def test_stream_closed_early_releases_half_open_probe(server):
+    client = LLMClient("test", base_url=server.base_url, max_retries=0, max_concurrency=1,
+                       breaker=open_breaker())
+    time.sleep(0.15)
+    stream = client.stream_chat(MESSAGES)
+    assert next(stream)
+    # What the API does when an /ask/stream client disconnects
+    stream.close()
+
+    assert client.breaker.state == CircuitBreaker.HALF_OPEN
+    assert client.available()
+    assert client.chat(MESSAGES)
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_client_errors_are_neutral_for_the_breaker():
+    server = fast_server(error_rate=1.0, error_status=401)
+    try:
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.1)
+        breaker.record_failure()
+        client = LLMClient("test", base_url=server.base_url, max_retries=0, breaker=breaker)
+        with pytest.raises(LLMError, match="401"):
+            client.chat(MESSAGES)
+        # The earlier failure still counts
+        assert breaker.consecutive_failures == 1
+
+        breaker.record_failure()
+        time.sleep(0.15)
+        with pytest.raises(LLMError, match="401"):
+            client.chat(MESSAGES)
+        # A 401 probe doesn't close the breaker, and the next request may probe again
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow_request()
+    finally:
+        server.stop()
@@ -0,0 +1,12 @@
+from src.preprocessor import map_chunks, clean_faq_chunk
+
+RAW = [{'question': f"how do i pay bill number {i}", 'answer': f"Use the Payments tab to pay bill {i} in the app."}
+       for i in range(40)]
+
+
+def test_map_chunks_keeps_input_order_across_workers():
+    chunks = [RAW[i:i + 7] for i in range(0, len(RAW), 7)]
+    sequential = list(map_chunks(clean_faq_chunk, iter(chunks), workers=1))
+    parallel = list(map_chunks(clean_faq_chunk, iter(chunks), workers=2))
+    assert parallel == sequential
+    assert [size for size, _ in parallel] == [len(chunk) for chunk in chunks]
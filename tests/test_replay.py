@@ -0,0 +1,16 @@
+from loadtest.replay import _percentile
+
+
+def test_percentile_uses_nearest_rank():
+    values = [float(i) for i in range(1, 101)]
+    assert _percentile(values, 95) == 95.0
+    assert _percentile(values, 50) == 50.0
+    assert _percentile(values, 99) == 99.0
+    assert _percentile(values, 100) == 100.0
+    assert _percentile(values, 0) == 1.0
+
+
+def test_percentile_of_small_and_empty_samples():
+    assert _percentile([], 95) == 0.0
+    assert _percentile([3.0], 50) == 3.0
+    assert _percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.0
@@ -0,0 +1,31 @@
+from src.tracing import Tracer, span
+
+
+def test_spans_nest_under_the_trace():
+    tracer = Tracer(slow_ms=0)
+    with tracer.trace("request"):
+        with span("retrieval"):
+            with span("encode"):
+                pass
+        with span("llm"):
+            pass
+    trace = tracer.slow_traces()[0]
+    assert [s['name'] for s in trace['spans']] == ["retrieval", "llm"]
+    assert trace['spans'][0]['children'][0]['name'] == "encode"
+
+
+def test_fast_traces_are_not_kept():
+    tracer = Tracer(slow_ms=60_000)
+    with tracer.trace("request"):
+        pass
+    assert tracer.slow_traces() == []
+
+
+def test_query_text_is_redacted_by_default():
+    assert Tracer().redact("my account number is 1234") == "<redacted, 25 chars>"
+
+
+def test_query_text_is_truncated_when_allowed():
+    tracer = Tracer(query_chars=10)
+    assert tracer.redact("short") == "short"
+    assert tracer.redact("how do I close my account") == "how do I c..."
@@ -0,0 +1,32 @@
+import numpy as np
+
+from src.utils import TextSimilarity, EmbeddingSimilarity, calculate_similarity_score
+
+
+def test_text_similarity_matches_pairwise_score():
+    corpus = ["how do I pay my bill", "pay a bill with upi", "activate my debit card"]
+    similarity = TextSimilarity(corpus)
+    scores = similarity.pair_scores(corpus[:2], corpus[1:])
+    assert scores.shape == (2,)
+    assert scores[0] > scores[1]
+    assert 0 < calculate_similarity_score(corpus[0], corpus[1]) <= 1
+
+
+def test_embedding_similarity_matches_search(faq_embeddings):
+    similarity = EmbeddingSimilarity(faq_embeddings)
+    queries = ["how do I activate my card", "kyc documents"]
+    indices, scores = similarity.top_matches(queries, k=1)
+    assert list(indices[:, 0]) == [0, 1]
+
+    served = faq_embeddings.encode_queries(queries) @ similarity.vectors.T
+    assert np.allclose(similarity.query_scores(queries), served, atol=1e-5)
+
+
+def test_embedding_similarity_leaves_the_serving_cache_alone(faq_embeddings):
+    stages = []
+    faq_embeddings.stages.add_listener(lambda name, elapsed, error: stages.append(name))
+    similarity = EmbeddingSimilarity(faq_embeddings)
+    similarity.query_scores(["how do I activate my card"])
+    similarity.pair_scores(["rewards"], ["jewels"])
+    assert len(faq_embeddings.query_cache) == 0
+    assert stages == []